@@ -1,4 +1,6 @@
 from pathlib import Path
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -6,20 +8,96 @@ class Settings(BaseSettings):
     openai_api_key: str = ""
     anthropic_api_key: str = ""
     ollama_base_url: str = "http://localhost:11434"
+    ollama_refresh_interval: float = 30  # seconds between model list refreshes
+    ollama_max_backoff: float = 300  # longest wait between checks while Ollama is down
+    ollama_timeout: float = 3
+    ollama_num_ctx: int = 8192  # context window requested per chat; 0 keeps the model default
     papers_root: str = str(Path.home() / "Documents")
     database_url: str = ""
     supabase_url: str = ""
     supabase_service_key: str = ""
     supabase_jwt_secret: str = ""
+    jwt_cache_enabled: bool = True  # skip re-verifying a token until it expires
+    jwt_negative_cache_ttl: float = 5  # seconds a token that failed verification is remembered
+    subscription_cache_ttl: float = 60  # seconds; 0 fetches on every request
+    usage_flush_interval: float = 5  # seconds between batched token usage uploads
+
+    # Shared outbound HTTP client (Supabase, Ollama)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30  # seconds an idle connection stays open
+    http_timeout: float = 10
+    http_connect_timeout: float = 5
+    http2: bool = True  # used only when the h2 package is installed
+
+    # On-disk store of extracted page text (survives backend restarts)
+    cache_dir: str = ""
+    text_store_enabled: bool = True
+    text_store_hash_content: bool = False
+
+    # In-memory cache shared by extracted text, token counts and retrieval indexes
+    memory_cache_max_bytes: int = 256 * 1024 * 1024
+    memory_cache_ttl: float = 0  # seconds; 0 disables expiry
+
+    # Pool that runs PyMuPDF work off the event loop
+    pdf_executor: Literal["thread", "process"] = "thread"
+    pdf_workers: int = 0  # 0 = min(4, CPU count)
+    pdf_job_timeout: float = 120  # seconds; 0 disables the timeout
+
+    # Documents with at least this many pages are extracted in parallel shards
+    parallel_extract_min_pages: int = 64
+    parallel_extract_workers: int = 0  # 0 = CPU count; 1 disables sharding
+
+    # Open PyMuPDF documents kept for reuse (per process)
+    document_pool_size: int = 16
+    document_pool_idle_timeout: float = 300  # seconds; 0 keeps handles until evicted
+
+    # Chunk ranking for long papers: "bm25" (NumPy only) or "tfidf" (scikit-learn)
+    retrieval_engine: Literal["bm25", "tfidf"] = "bm25"
+    chunk_max_tokens: int = 512
+    chunk_overlap_tokens: int = 64
+    # Paper context budget per request; papers under it are sent whole
+    context_tokens_local: int = 4_000  # Ollama models; capped at half of ollama_num_ctx
+    context_tokens_cloud: int = 30_000
+
+    # Extract, tokenize and index papers in the background as soon as they are opened
+    prewarm_enabled: bool = True
+    prewarm_workers: int = 1
+
+    # Background crawl of papers_root into the papers table
+    library_index_enabled: bool = True
+    library_scan_interval: float = 600  # seconds between incremental rescans
+    library_scan_workers: int = 2  # PDFs read concurrently during a scan
+
+    # Page images and thumbnails: rendered in a process pool, cached on disk (LRU)
+    render_workers: int = 0  # 0 = same as pdf_workers
+    render_cache_max_bytes: int = 512 * 1024 * 1024
+
+    # Directories listed concurrently by /api/files/discover
+    discover_workers: int = 8
+
+    # SQLite FTS5 index of page text, filled by pre-warm when a paper is opened
+    search_index_enabled: bool = True
+    # Also extract and index every PDF the library scan finds (whole papers_root)
+    search_index_library: bool = False
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
+    def get_data_dir(self) -> Path:
+        data_dir = Path(__file__).parent.parent.parent / "data"
+        data_dir.mkdir(parents=True, exist_ok=True)
+        return data_dir
+
     def get_database_url(self) -> str:
         if self.database_url:
             return self.database_url
-        db_path = Path(__file__).parent.parent.parent / "data" / "papers.db"
-        db_path.parent.mkdir(parents=True, exist_ok=True)
+        db_path = self.get_data_dir() / "papers.db"
         return f"sqlite+aiosqlite:///{db_path}"
 
+    def get_cache_dir(self) -> Path:
+        cache_dir = Path(self.cache_dir) if self.cache_dir else self.get_data_dir() / "cache"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        return cache_dir
+
 
 settings = Settings()
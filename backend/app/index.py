@@ -0,0 +1,205 @@
+"""Pre-build the caches the chat path needs for every PDF under a directory tree.
+
+Usage (from backend/):
+    python -m app.index [ROOT] [--workers N] [--force] [--all-indexes]
+
+Each paper gets its extracted text, metadata, token count and (for papers over
+the smallest context budget) retrieval index written to the text store, in a
+pool of worker processes. A paper is marked done only after all of its
+artifacts are written, so an interrupted run picks up where it stopped, and
+papers already indexed with the current settings are skipped.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from app.config import settings
+from app.services.context_service import (
+    TOKEN_COUNT_KIND,
+    get_retrieval_threshold,
+    load_or_count_tokens,
+)
+from app.services.pdf_service import extract_text, load_or_read_metadata
+from app.services.retrieval_service import get_index_kind, load_or_build_index
+from app.services.text_store import STORE_VERSION, load_object, save_object
+from app.utils.file_identity import get_file_identity
+
+# Marker written once every artifact for a file version is in the store
+MANIFEST_KIND = "indexed"
+
+
+def find_pdfs(root: Path) -> list[str]:
+    paths = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = sorted(d for d in dir_names if not d.startswith("."))
+        paths.extend(
+            os.path.join(dir_path, name)
+            for name in sorted(file_names)
+            if name.lower().endswith(".pdf") and not name.startswith(".")
+        )
+    return paths
+
+
+def _manifest(all_indexes: bool) -> dict:
+    return {
+        "text": STORE_VERSION,
+        "tokens": TOKEN_COUNT_KIND,
+        "index": get_index_kind(),
+        "all_indexes": all_indexes,
+    }
+
+
+def index_paper(pdf_path: str, force: bool = False, all_indexes: bool = False) -> dict:
+    """Build every cached artifact for one paper. Runs in a worker process."""
+    started = time.perf_counter()
+    result = {"path": pdf_path, "status": "skipped", "pages": 0, "error": ""}
+    try:
+        identity = get_file_identity(pdf_path, hash_content=settings.text_store_hash_content)
+        manifest = _manifest(all_indexes)
+        stored = load_object(MANIFEST_KIND, identity)
+        if not force and stored is not None and _covers(stored, manifest):
+            result["pages"] = stored["pages"]
+            return result
+
+        pages = extract_text(pdf_path)
+        load_or_read_metadata(pdf_path)
+        token_count = load_or_count_tokens(identity, "\n\n".join(p["text"] for p in pages))
+        # Same rule as pre-warm: only papers over the smallest budget use retrieval
+        if all_indexes or token_count >= get_retrieval_threshold():
+            load_or_build_index(pdf_path)
+
+        save_object(MANIFEST_KIND, identity, {**manifest, "pages": len(pages)})
+        result.update(status="indexed", pages=len(pages))
+    except Exception as e:
+        result.update(status="failed", error=f"{type(e).__name__}: {e}")
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def _covers(stored: dict, manifest: dict) -> bool:
+    # A run with --all-indexes also satisfies a later run without it
+    if stored.get("all_indexes") and not manifest["all_indexes"]:
+        manifest = {**manifest, "all_indexes": True}
+    return all(stored.get(k) == v for k, v in manifest.items())
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.index", description="Pre-build paper caches for a directory tree."
+    )
+    parser.add_argument("root", nargs="?", default=settings.papers_root)
+    parser.add_argument(
+        "--workers", type=int, default=0, help="worker processes (default: CPU count)"
+    )
+    parser.add_argument("--force", action="store_true", help="rebuild papers already indexed")
+    parser.add_argument(
+        "--all-indexes",
+        action="store_true",
+        help="build retrieval indexes for short papers too",
+    )
+    args = parser.parse_args(argv)
+
+    if not settings.text_store_enabled:
+        print("TEXT_STORE_ENABLED is off; nowhere to store the results.", file=sys.stderr)
+        return 1
+    root = Path(args.root).expanduser().resolve()
+    if not root.is_dir():
+        print(f"Not a directory: {root}", file=sys.stderr)
+        return 1
+
+    paths = find_pdfs(root)
+    workers = args.workers or os.cpu_count() or 1
+    print(f"Indexing {len(paths)} PDFs under {root} with {workers} workers", file=sys.stderr)
+    print(f"Cache: {settings.get_cache_dir()}", file=sys.stderr)
+
+    counts = {"indexed": 0, "skipped": 0, "failed": 0}
+    pages_indexed = 0
+    started = time.perf_counter()
+    progress = _Progress(len(paths))
+
+    # Spawn, not fork: workers start clean rather than inheriting the parent's state
+    executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    try:
+        futures = [
+            executor.submit(index_paper, path, args.force, args.all_indexes) for path in paths
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            counts[result["status"]] += 1
+            if result["status"] == "indexed":
+                pages_indexed += result["pages"]
+            elif result["status"] == "failed":
+                progress.message(f"FAILED {result['path']}: {result['error']}")
+            progress.update(result["path"], counts)
+    except KeyboardInterrupt:
+        progress.message("Interrupted; finished papers are kept and skipped on the next run")
+        return 130
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    progress.finish()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Done in {elapsed:.1f}s: {counts['indexed']} indexed, {counts['skipped']} up to date, "
+        f"{counts['failed']} failed",
+        file=sys.stderr,
+    )
+    if counts["indexed"]:
+        print(
+            f"Throughput: {counts['indexed'] / elapsed:.2f} papers/s, "
+            f"{pages_indexed / elapsed:.1f} pages/s ({pages_indexed} pages)",
+            file=sys.stderr,
+        )
+    return 1 if counts["failed"] else 0
+
+
+class _Progress:
+    """One-line progress on a terminal, one line per 5% otherwise (e.g. in a log file)."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.started = time.perf_counter()
+        self.tty = sys.stderr.isatty()
+        self._last_step = -1
+
+    def update(self, path: str, counts: dict) -> None:
+        self.done += 1
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed else 0.0
+        eta = (self.total - self.done) / rate if rate else 0.0
+        line = (
+            f"[{self.done}/{self.total}] {rate:.2f} files/s, ETA {eta:.0f}s "
+            f"({counts['indexed']} indexed, {counts['skipped']} skipped, "
+            f"{counts['failed']} failed)"
+        )
+        if self.tty:
+            name = Path(path).name
+            sys.stderr.write(f"\r\033[K{line} {name[:40]}")
+            sys.stderr.flush()
+        else:
+            step = self.done * 20 // max(self.total, 1)
+            if step != self._last_step or self.done == self.total:
+                self._last_step = step
+                print(line, file=sys.stderr)
+
+    def message(self, text: str) -> None:
+        if self.tty:
+            sys.stderr.write("\r\033[K")
+        print(text, file=sys.stderr)
+
+    def finish(self) -> None:
+        if self.tty and self.total:
+            sys.stderr.write("\n")
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,16 +1,51 @@
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.config import settings
 from app.database import init_db
-from app.routers import chat, files, highlights, papers, subscription
+from app.routers import admin, chat, files, highlights, papers, subscription
+from app.services.document_pool import document_pool
+from app.services.library_service import start_library_indexer, stop_library_indexer
+from app.services.ollama_service import (
+    get_ollama_status,
+    start_ollama_registry,
+    stop_ollama_registry,
+)
+from app.services.prewarm_service import start_prewarm_workers, stop_prewarm_workers
+from app.services.search_service import init_search_index
+from app.services.usage_service import start_usage_flusher, stop_usage_flusher
+from app.services.worker_pool import shutdown_executor
+from app.utils.http_client import close_http_client, start_http_client
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    if settings.search_index_enabled:
+        try:
+            await init_search_index()
+        except Exception:
+            # e.g. an SQLite build without FTS5; the rest of the app works without search
+            logger.warning("Full-text search unavailable, disabling it", exc_info=True)
+            settings.search_index_enabled = False
+    await start_http_client()
+    start_prewarm_workers()
+    start_library_indexer()
+    start_usage_flusher()
+    start_ollama_registry()
     yield
+    await stop_ollama_registry()
+    await stop_usage_flusher()
+    await stop_library_indexer()
+    await stop_prewarm_workers()
+    shutdown_executor()
+    document_pool.close_all()
+    await close_http_client()
 
 
 app = FastAPI(title="AI Paper Reader", version="0.1.0", lifespan=lifespan)
@@ -22,6 +57,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 app.include_router(files.router, prefix="/api/files", tags=["files"])
@@ -29,15 +65,19 @@ app.include_router(papers.router, prefix="/api/papers", tags=["papers"])
 app.include_router(highlights.router, prefix="/api/highlights", tags=["highlights"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 app.include_router(subscription.router, prefix="/api/subscription", tags=["subscription"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 
 @app.get("/api/health")
 async def health():
-    return {"status": "ok"}
+    # From the registry's last check; never waits on Ollama
+    ollama = get_ollama_status()
+    return {"status": "ok", "ollama": ollama["available"]}
 
 
 if __name__ == "__main__":
     import argparse
+    import multiprocessing
 
     import uvicorn
 
@@ -45,4 +85,6 @@ if __name__ == "__main__":
     parser.add_argument("--port", type=int, default=8000)
     parser.add_argument("--host", type=str, default="127.0.0.1")
     args = parser.parse_args()
+    # Required for the process-pool PDF executor in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     uvicorn.run(app, host=args.host, port=args.port)
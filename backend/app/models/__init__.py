@@ -1,5 +1,7 @@
 from app.models.highlight import Highlight
-from app.models.paper import Paper
+from app.models.paper import LibraryDirectory, Paper
 from app.models.chat import ChatMessage
+from app.models.search import SearchDocument
+from app.models.usage import UsageEvent
 
-__all__ = ["Highlight", "Paper", "ChatMessage"]
+__all__ = ["Highlight", "Paper", "LibraryDirectory", "ChatMessage", "SearchDocument", "UsageEvent"]
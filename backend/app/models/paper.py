@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, String
+from sqlalchemy import DateTime, Float, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -16,4 +16,20 @@ class Paper(Base):
     file_path: Mapped[str] = mapped_column(String, unique=True)
     title: Mapped[str] = mapped_column(String, default="")
     page_count: Mapped[int] = mapped_column(Integer, default=0)
-    last_opened: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_opened: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    author: Mapped[str] = mapped_column(String, default="")
+    directory: Mapped[str] = mapped_column(String, default="", index=True)
+    file_size: Mapped[int] = mapped_column(Integer, default=0)
+    file_mtime: Mapped[float] = mapped_column(Float, default=0.0)
+    open_count: Mapped[int] = mapped_column(Integer, default=0)
+    indexed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class LibraryDirectory(Base):
+    """Directory mtimes from the last library crawl, so unchanged directories are not re-listed."""
+
+    __tablename__ = "library_directories"
+
+    path: Mapped[str] = mapped_column(String, primary_key=True)
+    mtime: Mapped[float] = mapped_column(Float, default=0.0)
+    subdirs_json: Mapped[str] = mapped_column(Text, default="[]")
@@ -0,0 +1,60 @@
+import asyncio
+
+from fastapi import APIRouter
+
+from app.services.document_pool import document_pool
+from app.services.ollama_service import get_ollama_status
+from app.services.render_cache import render_cache
+from app.services.search_service import get_search_stats
+from app.services.usage_service import get_usage_stats
+from app.utils.cache import memory_cache
+from app.utils.http_client import http_client_stats
+from app.utils.singleflight import single_flight
+
+router = APIRouter()
+
+
+@router.get("/cache")
+async def cache_stats():
+    return memory_cache.stats()
+
+
+@router.delete("/cache", status_code=204)
+async def clear_cache():
+    memory_cache.clear()
+
+
+@router.get("/singleflight")
+async def singleflight_stats():
+    return single_flight.stats()
+
+
+@router.get("/documents")
+async def document_pool_stats():
+    return document_pool.stats()
+
+
+@router.get("/search")
+async def search_index_stats():
+    return await get_search_stats()
+
+
+@router.get("/renders")
+async def render_cache_stats():
+    # The first call indexes the render directory
+    return await asyncio.to_thread(render_cache.stats)
+
+
+@router.get("/http")
+async def http_stats():
+    return http_client_stats()
+
+
+@router.get("/usage")
+async def usage_stats():
+    return get_usage_stats()
+
+
+@router.get("/ollama")
+async def ollama_status():
+    return get_ollama_status()
@@ -14,6 +14,7 @@ from app.services.llm_service import (
     get_available_models,
     stream_completion_with_tracking,
 )
+from app.services.prewarm_service import wait_for_prewarm
 from app.services.subscription_service import (
     check_token_limit,
     get_allowed_models,
@@ -26,9 +27,9 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-def _resolve_model(model: str) -> str:
+async def _resolve_model(model: str) -> str:
     if not model or model == "auto":
-        available = get_available_models()
+        available = await get_available_models()
         if available:
             return available[0]["id"]
         raise HTTPException(
@@ -66,8 +67,11 @@ async def _check_cloud_access(user_id: str | None, model: str):
 
 
 @router.get("/models", response_model=list[ModelInfo])
-async def list_models(user_id: str | None = Depends(get_optional_user_id)):
-    all_models = get_available_models()
+async def list_models(
+    refresh: bool = False,
+    user_id: str | None = Depends(get_optional_user_id),
+):
+    all_models = await get_available_models(refresh=refresh)
 
     if not user_id:
         # Unauthenticated: return all models but mark cloud ones as locked
@@ -94,15 +98,19 @@ async def ask_about_selection(
     request: AskRequest,
     user_id: str | None = Depends(get_optional_user_id),
 ):
-    model = _resolve_model(request.model)
+    model = await _resolve_model(request.model)
     await _check_cloud_access(user_id, model)
 
     try:
-        paper_context = prepare_paper_context(
-            request.paper_path, request.selected_text
+        # Let an in-flight pre-warm finish rather than repeating its work
+        await wait_for_prewarm(request.paper_path)
+        paper_context = await prepare_paper_context(
+            request.paper_path, request.selected_text, model
         )
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="PDF file not found")
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out reading PDF")
     except Exception as e:
         logger.exception("Failed to prepare paper context")
         raise HTTPException(status_code=500, detail=f"Failed to read PDF: {e}")
@@ -135,16 +143,20 @@ async def chat_conversation(
     request: ConversationRequest,
     user_id: str | None = Depends(get_optional_user_id),
 ):
-    model = _resolve_model(request.model)
+    model = await _resolve_model(request.model)
     await _check_cloud_access(user_id, model)
 
     try:
-        paper_context = prepare_paper_context(
+        await wait_for_prewarm(request.paper_path)
+        paper_context = await prepare_paper_context(
             request.paper_path,
             request.messages[-1].content if request.messages else None,
+            model,
         )
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="PDF file not found")
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out reading PDF")
     except Exception as e:
         logger.exception("Failed to prepare paper context")
         raise HTTPException(status_code=500, detail=f"Failed to read PDF: {e}")
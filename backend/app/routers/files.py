@@ -1,7 +1,18 @@
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+import json
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sse_starlette.sse import EventSourceResponse
 
 from app.schemas.file_browser import FileEntry, RootEntry
-from app.services.file_service import browse_directory, get_roots
+from app.services.file_service import (
+    browse_directory,
+    discover_pdfs,
+    get_directory_listing,
+    get_roots,
+)
 
 router = APIRouter()
 
@@ -12,10 +23,63 @@ async def list_roots():
 
 
 @router.get("/browse", response_model=list[FileEntry])
-async def browse(path: str = Query(..., description="Directory path to browse")):
+async def browse(
+    request: Request,
+    response: Response,
+    path: str = Query(..., description="Directory path to browse"),
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page"),
+    limit: int | None = Query(None, ge=1, le=5000, description="Entries per page (default: all)"),
+):
+    try:
+        # Listing a large or network-mounted directory must not block the event loop
+        page = await asyncio.to_thread(browse_directory, path, cursor, limit)
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"ETag": page.etag, "Cache-Control": "private, no-cache"}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if page.etag in _parse_if_none_match(request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return page.entries
+
+
+@router.get("/discover")
+async def discover(
+    path: str = Query(..., description="Directory to search recursively"),
+    max_depth: int | None = Query(None, ge=0, description="0 searches only this directory"),
+    q: str | None = Query(None, description="Name filter: substring, or glob with * ? ["),
+    limit: int | None = Query(None, ge=1),
+    stream: Literal["ndjson", "sse"] = Query("ndjson"),
+):
+    # Check the root up front so errors are proper status codes, not a broken stream
     try:
-        return browse_directory(path)
+        await asyncio.to_thread(get_directory_listing, path)
     except PermissionError as e:
         raise HTTPException(status_code=403, detail=str(e))
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
+
+    entries = discover_pdfs(path, max_depth, q, limit)
+    if stream == "sse":
+        return EventSourceResponse(_discover_events(entries))
+    return StreamingResponse(
+        (e.model_dump_json() + "\n" async for e in entries), media_type="application/x-ndjson"
+    )
+
+
+async def _discover_events(entries):
+    count = 0
+    async for entry in entries:
+        count += 1
+        yield {"event": "pdf", "data": entry.model_dump_json()}
+    yield {"event": "done", "data": json.dumps({"count": count})}
+
+
+def _parse_if_none_match(value: str) -> set[str]:
+    return {tag.strip().removeprefix("W/") for tag in value.split(",") if tag.strip()}
@@ -1,20 +1,61 @@
+import asyncio
+import json
 import os
 from pathlib import Path
+from typing import Literal
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sse_starlette.sse import EventSourceResponse
 
-from app.schemas.paper import PaperMetadata, PaperText, PageText
-from app.services.pdf_service import extract_text, get_metadata
+from app.config import settings
+from app.database import get_db
+from app.models.paper import Paper
+from app.schemas.paper import (
+    LibraryPaper,
+    MetadataBatchRequest,
+    MetadataBatchResponse,
+    MetadataBatchResult,
+    PaperMetadata,
+    PaperText,
+    PageText,
+    PrewarmJobStatus,
+    SearchResults,
+)
+from app.services.context_service import (
+    get_paper_metadata,
+    get_paper_pages,
+    iter_paper_metadata,
+    iter_paper_pages,
+)
+from app.services.library_service import get_scan_status, record_paper_opened, request_scan
+from app.services.prewarm_service import (
+    PRIORITY_METADATA,
+    PRIORITY_OPEN,
+    cancel_prewarm,
+    get_prewarm_jobs,
+    schedule_prewarm,
+)
+from app.services.render_cache import get_rendered_page
+from app.services.search_service import search_pages
 
 router = APIRouter()
 
 
 @router.get("/pdf")
-async def serve_pdf(path: str = Query(...)):
+async def serve_pdf(
+    request: Request, path: str = Query(...), db: AsyncSession = Depends(get_db)
+):
     pdf_path = Path(path)
     if not pdf_path.exists() or pdf_path.suffix.lower() != ".pdf":
         raise HTTPException(status_code=404, detail="PDF not found")
+    # pdf.js opens a document with one plain GET, then fetches chunks with Range
+    # requests; only the plain GET counts as opening the paper
+    if "range" not in request.headers:
+        schedule_prewarm(path, PRIORITY_OPEN)
+        await record_paper_opened(db, path)
     return FileResponse(
         str(pdf_path),
         media_type="application/pdf",
@@ -26,18 +67,207 @@ async def serve_pdf(path: str = Query(...)):
 @router.get("/text", response_model=PaperText)
 async def get_text(
     path: str = Query(...),
-    page: int | None = Query(None, description="Specific page number (0-indexed)"),
+    page: int | None = Query(None, ge=0, description="Specific page number (0-indexed)"),
+    start: int | None = Query(None, ge=0, description="First page of a range (0-indexed)"),
+    end: int | None = Query(None, ge=0, description="End of a range (exclusive)"),
+    stream: Literal["ndjson", "sse"] | None = Query(
+        None, description="Stream one page per line (ndjson) or event (sse) as it is extracted"
+    ),
 ):
+    if stream is not None:
+        if page is not None:
+            start, end = page, page + 1
+        try:
+            pages = iter_paper_pages(path, start, end)
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        if stream == "sse":
+            return EventSourceResponse(_page_events(pages))
+        return StreamingResponse(_page_lines(pages), media_type="application/x-ndjson")
+
     try:
-        pages = extract_text(path, page_num=page)
+        pages = await get_paper_pages(path, page_num=page, start=start, end=end)
         return PaperText(pages=[PageText(**p) for p in pages])
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out extracting PDF text")
+
+
+async def _page_lines(pages):
+    async for p in pages:
+        yield json.dumps(p) + "\n"
+
+
+async def _page_events(pages):
+    async for p in pages:
+        yield {"event": "page", "data": json.dumps(p)}
+    yield {"event": "done", "data": "{}"}
+
+
+@router.get("/page-image")
+async def page_image(
+    path: str = Query(...),
+    page: int = Query(0, ge=0, description="Page number (0-indexed)"),
+    scale: float = Query(1.0, gt=0, le=8, description="Zoom; 1.0 = 72 dpi"),
+    format: Literal["png", "jpeg"] = Query("png"),
+):
+    return await _render_response(path, page, scale=scale, fmt=format)
+
+
+@router.get("/thumbnail")
+async def thumbnail(
+    path: str = Query(...),
+    width: int = Query(256, ge=16, le=2048, description="Width in pixels"),
+    page: int = Query(0, ge=0),
+):
+    return await _render_response(path, page, width=width, fmt="jpeg")
+
+
+async def _render_response(
+    path: str, page: int, scale: float | None = None, width: int | None = None, fmt: str = "png"
+):
+    if Path(path).suffix.lower() != ".pdf":
+        raise HTTPException(status_code=404, detail="PDF not found")
+    try:
+        image = await get_rendered_page(path, page, scale=scale, width=width, fmt=fmt)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out rendering page")
+    # The file name is derived from the PDF's identity, so FileResponse's ETag
+    # changes whenever the PDF does
+    return FileResponse(
+        image,
+        media_type=f"image/{fmt}",
+        headers={"Cache-Control": "private, max-age=3600"},
+    )
 
 
 @router.get("/metadata", response_model=PaperMetadata)
-async def get_paper_metadata(path: str = Query(...)):
+async def read_metadata(path: str = Query(...)):
     try:
-        return PaperMetadata(**get_metadata(path))
+        metadata = PaperMetadata(**await get_paper_metadata(path))
+        schedule_prewarm(path, PRIORITY_METADATA)
+        return metadata
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out reading PDF metadata")
+
+
+@router.post("/metadata/batch", response_model=MetadataBatchResponse)
+async def read_metadata_batch(
+    data: MetadataBatchRequest,
+    stream: Literal["ndjson"] | None = Query(
+        None, description="Stream one result per line as each file is parsed"
+    ),
+):
+    """Metadata for many files at once, in the order they finish.
+
+    Without stream, returns whatever is ready after data.wait seconds; the rest
+    is listed in pending and can be requested again (parsing that has started
+    continues in the background and is cached).
+    """
+    results = iter_paper_metadata(data.paths)
+    if stream == "ndjson":
+        return StreamingResponse(
+            (_batch_result(*r).model_dump_json() + "\n" async for r in results),
+            media_type="application/x-ndjson",
+        )
+
+    done: list[MetadataBatchResult] = []
+    try:
+        async with asyncio.timeout(data.wait):
+            async for r in results:
+                done.append(_batch_result(*r))
+    except TimeoutError:
+        pass
+    finally:
+        await results.aclose()
+    finished = {r.path for r in done}
+    return MetadataBatchResponse(
+        results=done, pending=[p for p in dict.fromkeys(data.paths) if p not in finished]
+    )
+
+
+def _batch_result(path: str, metadata: dict | None, error: Exception | None) -> MetadataBatchResult:
+    if error is None:
+        return MetadataBatchResult(path=path, metadata=PaperMetadata(**metadata))
+    if isinstance(error, FileNotFoundError):
+        return MetadataBatchResult(path=path, error="not_found")
+    if isinstance(error, TimeoutError):
+        return MetadataBatchResult(path=path, error="timeout")
+    return MetadataBatchResult(path=path, error=f"{type(error).__name__}: {error}")
+
+
+@router.get("/prewarm", response_model=list[PrewarmJobStatus])
+async def list_prewarm_jobs():
+    return get_prewarm_jobs()
+
+
+@router.delete("/prewarm", status_code=204)
+async def cancel_prewarm_job(path: str = Query(...)):
+    if not cancel_prewarm(path):
+        raise HTTPException(status_code=404, detail="No pending pre-warm job for this paper")
+
+
+@router.get("/library", response_model=list[LibraryPaper])
+async def list_library(
+    q: str | None = Query(None, description="Filter by title, author or file path"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    query = select(Paper).where(Paper.indexed_at.is_not(None))
+    if q:
+        pattern = f"%{q}%"
+        query = query.where(
+            or_(
+                Paper.title.ilike(pattern),
+                Paper.author.ilike(pattern),
+                Paper.file_path.ilike(pattern),
+            )
+        )
+    result = await db.execute(
+        query.order_by(Paper.title, Paper.file_path).offset(offset).limit(limit)
+    )
+    return result.scalars().all()
+
+
+@router.get("/recent", response_model=list[LibraryPaper])
+async def list_recent(limit: int = Query(20, ge=1, le=200), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(
+        select(Paper)
+        .where(Paper.open_count > 0)
+        .order_by(Paper.last_opened.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+@router.post("/library/scan", status_code=202)
+async def start_library_scan(
+    full: bool = Query(False, description="Re-check every file, not only changed directories"),
+):
+    if not request_scan(full):
+        raise HTTPException(status_code=409, detail="A library scan is already running")
+    return get_scan_status()
+
+
+@router.get("/library/status")
+async def library_status():
+    return get_scan_status()
+
+
+@router.get("/search", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    if not settings.search_index_enabled:
+        raise HTTPException(status_code=503, detail="Full-text search is disabled")
+    return await search_pages(q, limit, offset)
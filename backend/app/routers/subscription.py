@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends
 
-from app.services.subscription_service import get_user_subscription
-from app.utils.auth import get_optional_user_id
+from app.services.subscription_service import (
+    get_user_subscription,
+    invalidate_user_subscription,
+)
+from app.utils.auth import get_optional_user_id, get_required_user_id
 
 router = APIRouter()
 
@@ -36,3 +39,10 @@ async def subscription_status(user_id: str | None = Depends(get_optional_user_id
         "period_start": sub.get("period_start"),
         "period_end": sub.get("period_end"),
     }
+
+
+@router.post("/refresh")
+async def refresh_subscription(user_id: str = Depends(get_required_user_id)):
+    """Drop the cached subscription, e.g. after checkout, and return the current one."""
+    invalidate_user_subscription(user_id)
+    return await subscription_status(user_id)
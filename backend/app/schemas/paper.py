@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from datetime import datetime
+
+from pydantic import BaseModel, Field
 
 
 class PageText(BaseModel):
@@ -15,3 +17,62 @@ class PaperMetadata(BaseModel):
     title: str = ""
     author: str = ""
     subject: str = ""
+
+
+class MetadataBatchRequest(BaseModel):
+    paths: list[str] = Field(..., max_length=1000)
+    wait: float = Field(2.0, ge=0, le=60)  # seconds to collect results before replying
+
+
+class MetadataBatchResult(BaseModel):
+    path: str
+    metadata: PaperMetadata | None = None
+    error: str = ""
+
+
+class MetadataBatchResponse(BaseModel):
+    results: list[MetadataBatchResult]
+    pending: list[str]
+
+
+class PrewarmJobStatus(BaseModel):
+    path: str
+    status: str
+    priority: int
+    step: str = ""
+    steps_done: int = 0
+    steps_total: int = 0
+    error: str = ""
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+
+
+class LibraryPaper(BaseModel):
+    id: str
+    file_path: str
+    title: str
+    author: str = ""
+    page_count: int
+    file_size: int = 0
+    last_opened: datetime | None = None
+    open_count: int = 0
+
+    model_config = {"from_attributes": True}
+
+
+class SearchHit(BaseModel):
+    path: str
+    title: str
+    page_num: int
+    snippet: str
+    highlights: list[list[int]]  # [start, end) character offsets into snippet
+    score: float
+
+
+class SearchResults(BaseModel):
+    query: str
+    results: list[SearchHit]
+    offset: int
+    limit: int
+    has_more: bool
@@ -0,0 +1,127 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from app.config import settings
+from app.utils.tokens import count_tokens_batch, get_encoder
+
+# A page boundary ends the current chunk once it holds this share of the budget
+_PAGE_BREAK_FILL = 0.5
+
+
+@dataclass
+class Chunk:
+    text: str
+    page_start: int  # 0-indexed, inclusive
+    page_end: int  # 0-indexed, inclusive
+    token_count: int
+    section: str = ""
+
+
+def chunk_pages(
+    pages: list[dict],
+    toc: list | None = None,
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+) -> list[Chunk]:
+    """Split extracted pages into token-bounded chunks that keep their page provenance.
+
+    Lines are packed greedily up to max_tokens. A chunk never spans two sections
+    of the table of contents (levels 1-2), and it is closed at a page boundary
+    once it is at least half full. Consecutive chunks within a section share up
+    to overlap_tokens of trailing lines.
+    """
+    max_tokens = max_tokens or settings.chunk_max_tokens
+    if overlap_tokens is None:
+        overlap_tokens = settings.chunk_overlap_tokens
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    section_pages, section_titles = _section_starts(toc or [])
+
+    lines = [
+        (p["page_num"], line.strip())
+        for p in pages
+        for line in p["text"].splitlines()
+        if line.strip()
+    ]
+    units: list[tuple[int, str, int]] = []
+    for (page_num, line), n in zip(lines, count_tokens_batch([t for _, t in lines])):
+        if n <= max_tokens:
+            units.append((page_num, line, n))
+        else:
+            units.extend((page_num, piece, m) for piece, m in _split_long_line(line, max_tokens))
+
+    groups: list[tuple[list[tuple[int, str, int]], str]] = []
+    current: list[tuple[int, str, int]] = []
+    current_tokens = 0
+    current_section = ""
+    for page_num, line, n in units:
+        idx = bisect_right(section_pages, page_num) - 1
+        section = section_titles[idx] if idx >= 0 else ""
+
+        if current:
+            new_section = section != current_section
+            page_break = page_num != current[-1][0] and current_tokens >= (
+                max_tokens * _PAGE_BREAK_FILL
+            )
+            if new_section or page_break or current_tokens + n > max_tokens:
+                groups.append((current, current_section))
+                current = [] if new_section else _tail(current, overlap_tokens)
+                # Drop overlap lines that would push the next chunk over budget
+                while current and sum(u[2] for u in current) + n > max_tokens:
+                    current.pop(0)
+                current_tokens = sum(u[2] for u in current)
+
+        current.append((page_num, line, n))
+        current_tokens += n
+        current_section = section
+
+    if current:
+        groups.append((current, current_section))
+
+    texts = ["\n".join(u[1] for u in group) for group, _ in groups]
+    return [
+        Chunk(
+            text=text,
+            page_start=group[0][0],
+            page_end=group[-1][0],
+            token_count=token_count,
+            section=section,
+        )
+        for (group, section), text, token_count in zip(groups, texts, count_tokens_batch(texts))
+    ]
+
+
+def format_chunk(chunk: Chunk) -> str:
+    if chunk.page_start == chunk.page_end:
+        label = f"Page {chunk.page_start + 1}"
+    else:
+        label = f"Pages {chunk.page_start + 1}-{chunk.page_end + 1}"
+    if chunk.section:
+        label += f", {chunk.section}"
+    return f"[{label}]\n{chunk.text}"
+
+
+def _section_starts(toc: list) -> tuple[list[int], list[str]]:
+    # get_toc() rows are [level, title, page], page 1-based and -1 when unresolved
+    starts = sorted(
+        (entry[2] - 1, entry[1].strip()) for entry in toc if entry[0] <= 2 and entry[2] >= 1
+    )
+    return [s[0] for s in starts], [s[1] for s in starts]
+
+
+def _tail(units: list[tuple[int, str, int]], overlap_tokens: int) -> list[tuple[int, str, int]]:
+    tail: list[tuple[int, str, int]] = []
+    total = 0
+    for unit in reversed(units):
+        if total + unit[2] > overlap_tokens:
+            break
+        tail.insert(0, unit)
+        total += unit[2]
+    return tail
+
+
+def _split_long_line(line: str, max_tokens: int) -> list[tuple[str, int]]:
+    enc = get_encoder()
+    tokens = enc.encode_ordinary(line)
+    windows = [tokens[i : i + max_tokens] for i in range(0, len(tokens), max_tokens)]
+    return [(enc.decode(w), len(w)) for w in windows]
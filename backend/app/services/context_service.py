@@ -1,63 +1,253 @@
-import tiktoken
+import asyncio
+from collections.abc import AsyncIterator
+from pathlib import Path
 
-from app.services.pdf_service import get_full_text
+from app.config import settings
+from app.services.pdf_service import (
+    extract_text,
+    get_page_count,
+    load_or_read_metadata,
+    read_page,
+)
+from app.services.retrieval_service import (
+    RetrievalIndex,
+    load_or_build_index,
+    retrieve_relevant_chunks,
+)
+from app.services.text_store import load_object, save_object
+from app.services.worker_pool import get_worker_count, run_pdf_job
+from app.utils.cache import memory_cache
+from app.utils.file_identity import FileIdentity, get_file_identity_async
+from app.utils.singleflight import single_flight
+from app.utils.tokens import count_tokens
 
-_text_cache: dict[str, str] = {}
+memory_cache.register("paper_text")
+memory_cache.register("page_text")
+memory_cache.register("page_count", weigher=lambda _: 64)
+memory_cache.register("token_count", weigher=lambda _: 64)
+memory_cache.register("retrieval_index", weigher=lambda index: index.nbytes)
+memory_cache.register("metadata", weigher=lambda _: 512)
 
-TOKEN_THRESHOLD = 30_000
+# On-disk kind for per-paper token counts (stored next to the extracted text)
+TOKEN_COUNT_KIND = "tokens-gpt-4o"
+# Ollama's window when num_ctx is not set (older releases; newer ones use 4096)
+_OLLAMA_DEFAULT_NUM_CTX = 2048
 
 
-def count_tokens(text: str) -> int:
-    enc = tiktoken.encoding_for_model("gpt-4o")
-    return len(enc.encode(text))
+async def _identity(pdf_path: str) -> FileIdentity:
+    return await get_file_identity_async(pdf_path, hash_content=settings.text_store_hash_content)
 
 
-def get_paper_text(pdf_path: str) -> str:
-    if pdf_path not in _text_cache:
-        _text_cache[pdf_path] = get_full_text(pdf_path)
-    return _text_cache[pdf_path]
+async def get_paper_pages(
+    pdf_path: str,
+    identity: FileIdentity | None = None,
+    page_num: int | None = None,
+    start: int | None = None,
+    end: int | None = None,
+) -> list[dict]:
+    """Extract pages in the worker pool; concurrent requests for the same pages share one job.
 
+    For a page or range, pages already in the memory cache are not extracted
+    again. The cache is read and filled here rather than in the pool job,
+    which may run in a separate process.
+    """
+    identity = identity or await _identity(pdf_path)
+    if page_num is not None:
+        start, end = page_num, page_num + 1
+    if start is None and end is None:
+        return await _extract_pages(pdf_path, identity, None, None)
 
-def prepare_paper_context(pdf_path: str, question: str | None = None) -> str:
-    full_text = get_paper_text(pdf_path)
-    token_count = count_tokens(full_text)
+    page_count = await get_paper_page_count(pdf_path, identity)
+    end = page_count if end is None else min(end, page_count)
+    wanted = range(max(start or 0, 0), end)
+
+    texts: dict[int, str] = {}
+    for i in wanted:
+        text = memory_cache.get("page_text", (identity.key, i))
+        if text is not None:
+            texts[i] = text
+
+    missing = [i for i in wanted if i not in texts]
+    if missing:
+        for page in await _extract_pages(pdf_path, identity, missing[0], missing[-1] + 1):
+            texts[page["page_num"]] = page["text"]
+            memory_cache.set("page_text", (identity.key, page["page_num"]), page["text"])
+    return [{"page_num": i, "text": texts[i]} for i in wanted]
+
+
+async def _extract_pages(
+    pdf_path: str, identity: FileIdentity, start: int | None, end: int | None
+) -> list[dict]:
+    return await single_flight.do(
+        "extract",
+        (identity.key, start, end),
+        lambda: run_pdf_job(extract_text, pdf_path, None, start, end),
+    )
+
+
+async def get_paper_page_count(pdf_path: str, identity: FileIdentity | None = None) -> int:
+    identity = identity or await _identity(pdf_path)
+    page_count = memory_cache.get("page_count", identity.key)
+    if page_count is None:
+        page_count = await run_pdf_job(get_page_count, pdf_path)
+        memory_cache.set("page_count", identity.key, page_count)
+    return page_count
+
+
+def iter_paper_pages(
+    pdf_path: str, start: int | None = None, end: int | None = None
+) -> AsyncIterator[dict]:
+    """Yield pages one at a time, each extracted in the worker pool, for streaming responses.
+
+    The path is validated eagerly so callers can report a missing file before
+    the first page is produced. Pages are read individually and not accumulated,
+    so memory stays flat however long the document.
+    """
+    path = Path(pdf_path)
+    if not path.exists() or path.suffix.lower() != ".pdf":
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+    return _iter_paper_pages(str(path), start or 0, end)
+
+
+async def _iter_paper_pages(pdf_path: str, start: int, end: int | None) -> AsyncIterator[dict]:
+    identity = await _identity(pdf_path)
+    page_count = await get_paper_page_count(pdf_path, identity)
+    end = page_count if end is None else min(end, page_count)
+    for i in range(start, end):
+        # Cached pages are used, but streamed ones are not added to the cache
+        text = memory_cache.get("page_text", (identity.key, i))
+        if text is None:
+            text = await run_pdf_job(read_page, pdf_path, identity, i)
+        yield {"page_num": i, "text": text}
+
+
+async def get_paper_text(pdf_path: str, identity: FileIdentity | None = None) -> str:
+    identity = identity or await _identity(pdf_path)
+    text = memory_cache.get("paper_text", identity.key)
+    if text is None:
+        pages = await get_paper_pages(pdf_path, identity)
+        text = "\n\n".join(p["text"] for p in pages)
+        memory_cache.set("paper_text", identity.key, text)
+    return text
 
-    if token_count < TOKEN_THRESHOLD:
-        return full_text
 
-    return _retrieve_relevant_chunks(full_text, question or "", top_k=15)
+async def get_paper_token_count(pdf_path: str, identity: FileIdentity | None = None) -> int:
+    identity = identity or await _identity(pdf_path)
+    token_count = memory_cache.get("token_count", identity.key)
+    if token_count is None:
+        token_count = await single_flight.do(
+            "tokens", identity.key, lambda: _count_paper_tokens(pdf_path, identity)
+        )
+    return token_count
 
 
-def _retrieve_relevant_chunks(text: str, query: str, top_k: int = 15) -> str:
-    chunks = _split_into_chunks(text, chunk_size=1000)
-    if not query:
-        return "\n\n".join(chunks[:top_k])
+async def _count_paper_tokens(pdf_path: str, identity: FileIdentity) -> int:
+    text = await get_paper_text(pdf_path, identity)
+    # Tokenizing a long paper takes long enough to stall other requests
+    token_count = await asyncio.to_thread(load_or_count_tokens, identity, text)
+    memory_cache.set("token_count", identity.key, token_count)
+    return token_count
 
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
 
-    corpus = chunks + [query]
-    vectorizer = TfidfVectorizer(stop_words="english")
-    tfidf_matrix = vectorizer.fit_transform(corpus)
+def load_or_count_tokens(identity: FileIdentity, text: str) -> int:
+    token_count = load_object(TOKEN_COUNT_KIND, identity)
+    if token_count is None:
+        token_count = count_tokens(text)
+        save_object(TOKEN_COUNT_KIND, identity, token_count)
+    return token_count
+
+
+async def get_paper_metadata(pdf_path: str, identity: FileIdentity | None = None) -> dict:
+    """Metadata from memory, then the text store, and only then from the PDF itself."""
+    identity = identity or await _identity(pdf_path)
+    metadata = memory_cache.get("metadata", identity.key)
+    if metadata is None:
+        metadata = await single_flight.do(
+            "metadata", identity.key, lambda: run_pdf_job(load_or_read_metadata, pdf_path)
+        )
+        memory_cache.set("metadata", identity.key, metadata)
+    return metadata
+
+
+async def iter_paper_metadata(
+    paths: list[str],
+) -> AsyncIterator[tuple[str, dict | None, Exception | None]]:
+    """Yield (path, metadata, error) for each path, in the order they finish.
+
+    Cached entries come back immediately. At most one job per pool worker is
+    queued at a time, so a large batch cannot starve other PDF work. Closing
+    the generator early drops the paths still waiting for a slot; jobs already
+    running finish and fill the cache for the next request.
+    """
+    slots = asyncio.Semaphore(get_worker_count())
+
+    async def resolve(path: str):
+        try:
+            identity = await _identity(path)
+            metadata = memory_cache.get("metadata", identity.key)
+            if metadata is None:
+                async with slots:
+                    metadata = await get_paper_metadata(path, identity)
+            return path, metadata, None
+        except Exception as e:
+            return path, None, e
+
+    tasks = [asyncio.create_task(resolve(p)) for p in dict.fromkeys(paths)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def get_context_budget(model: str | None) -> int:
+    """Tokens of paper context to send; leaves room for the prompt, history and answer."""
+    if model and model.startswith("ollama/"):
+        # The paper gets at most half of the window; the rest is the system
+        # prompt, conversation history and the answer
+        window = settings.ollama_num_ctx or _OLLAMA_DEFAULT_NUM_CTX
+        return min(settings.context_tokens_local, window // 2)
+    return settings.context_tokens_cloud
+
+
+def get_retrieval_threshold() -> int:
+    """Papers with fewer tokens fit every model's budget and never use retrieval."""
+    return min(get_context_budget("ollama/"), get_context_budget(None))
+
+
+async def prepare_paper_context(
+    pdf_path: str, question: str | None = None, model: str | None = None
+) -> str:
+    identity = await _identity(pdf_path)
+    full_text = await get_paper_text(pdf_path, identity)
+    token_count = await get_paper_token_count(pdf_path, identity)
+
+    budget = get_context_budget(model)
+    if token_count < budget:
+        return full_text
 
-    query_vec = tfidf_matrix[-1]
-    chunk_vecs = tfidf_matrix[:-1]
-    similarities = cosine_similarity(query_vec, chunk_vecs).flatten()
+    index = await get_paper_index(pdf_path, identity)
+    return retrieve_relevant_chunks(index, question or "", budget)
 
-    top_indices = similarities.argsort()[-top_k:][::-1]
-    top_indices = sorted(top_indices)
 
-    return "\n\n".join(chunks[i] for i in top_indices)
+async def get_paper_index(
+    pdf_path: str, identity: FileIdentity | None = None
+) -> RetrievalIndex:
+    identity = identity or await _identity(pdf_path)
+    cache_key = (identity.key, settings.retrieval_engine)
+    index = memory_cache.get("retrieval_index", cache_key)
+    if index is None:
+        index = await single_flight.do(
+            "index", cache_key, lambda: _load_paper_index(pdf_path, cache_key)
+        )
+    return index
 
 
-def _split_into_chunks(text: str, chunk_size: int = 1000) -> list[str]:
-    words = text.split()
-    chunks = []
-    for i in range(0, len(words), chunk_size):
-        chunk = " ".join(words[i : i + chunk_size])
-        if chunk.strip():
-            chunks.append(chunk)
-    return chunks
+async def _load_paper_index(pdf_path: str, cache_key: tuple) -> RetrievalIndex:
+    index = await run_pdf_job(load_or_build_index, pdf_path)
+    memory_cache.set("retrieval_index", cache_key, index)
+    return index
 
 
 MATH_FORMATTING_INSTRUCTIONS = """
@@ -0,0 +1,162 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pymupdf
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Handle:
+    doc: pymupdf.Document
+    # MuPDF documents are not safe for concurrent use; one borrower at a time
+    lock: threading.RLock = field(default_factory=threading.RLock)
+    borrowers: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class DocumentPool:
+    """Bounded LRU pool of open PyMuPDF documents keyed by (path, mtime).
+
+    Borrowing a pooled document skips re-parsing the xref table and page tree.
+    A modified file gets a new key, so stale handles are never handed out; they
+    are closed once no longer borrowed. Handles idle longer than idle_timeout
+    are closed by a background reaper to release file descriptors.
+    """
+
+    def __init__(self, max_open: int, idle_timeout: float):
+        self.max_open = max_open
+        self.idle_timeout = idle_timeout
+        self._handles: OrderedDict[tuple[str, int], _Handle] = OrderedDict()
+        self._lock = threading.Lock()
+        self._reaper: threading.Thread | None = None
+        self._closing = False
+        self.hits = 0
+        self.opens = 0
+        self.evictions = 0
+        self.idle_closes = 0
+
+    @contextmanager
+    def borrow(self, pdf_path: str | Path) -> Iterator[pymupdf.Document]:
+        path = str(Path(pdf_path).resolve())
+        key = (path, os.stat(path).st_mtime_ns)
+
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None:
+                self.hits += 1
+                handle.borrowers += 1
+                self._handles.move_to_end(key)
+
+        if handle is None:
+            # Open outside the pool lock; if another thread won the race, use theirs
+            doc = pymupdf.open(path)
+            with self._lock:
+                handle = self._handles.get(key)
+                if handle is None:
+                    self.opens += 1
+                    handle = _Handle(doc)
+                    self._handles[key] = handle
+                    doc = None
+                else:
+                    self.hits += 1
+                handle.borrowers += 1
+                self._handles.move_to_end(key)
+            if doc is not None:
+                doc.close()
+            self._ensure_reaper()
+
+        try:
+            with handle.lock:
+                yield handle.doc
+        finally:
+            with self._lock:
+                handle.borrowers -= 1
+                handle.last_used = time.monotonic()
+                if self._closing and handle.borrowers == 0 and self._handles.get(key) is handle:
+                    self._close(key)
+                else:
+                    self._evict(path)
+
+    def close_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_timeout
+        with self._lock:
+            for key, handle in list(self._handles.items()):
+                if handle.borrowers == 0 and handle.last_used < deadline:
+                    self._close(key)
+                    self.idle_closes += 1
+
+    def close_all(self) -> None:
+        """Close every idle handle; borrowed ones are closed when they are returned.
+
+        Worker threads may still be running jobs at shutdown, and closing a
+        document under them crashes MuPDF.
+        """
+        with self._lock:
+            self._closing = True
+            for key, handle in list(self._handles.items()):
+                if handle.borrowers == 0:
+                    self._close(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "open": len(self._handles),
+                "borrowed": sum(1 for h in self._handles.values() if h.borrowers),
+                "max_open": self.max_open,
+                "hits": self.hits,
+                "opens": self.opens,
+                "evictions": self.evictions,
+                "idle_closes": self.idle_closes,
+            }
+
+    def _evict(self, path: str) -> None:
+        # Caller holds self._lock. Drop superseded versions of this file first, then LRU.
+        newest = max((k for k in self._handles if k[0] == path), key=lambda k: k[1], default=None)
+        for key in [k for k in self._handles if k[0] == path and k != newest]:
+            if self._handles[key].borrowers == 0:
+                self._close(key)
+        for key in list(self._handles):
+            if len(self._handles) <= self.max_open:
+                break
+            if self._handles[key].borrowers == 0:
+                self._close(key)
+                self.evictions += 1
+
+    def _close(self, key: tuple[str, int]) -> None:
+        handle = self._handles.pop(key)
+        try:
+            handle.doc.close()
+        except Exception:
+            logger.debug("Error closing pooled document %s", key[0], exc_info=True)
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is not None or self.idle_timeout <= 0:
+            return
+        with self._lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(
+                    target=self._reap, name="pdf-pool-reaper", daemon=True
+                )
+                self._reaper.start()
+
+    def _reap(self) -> None:
+        interval = max(1.0, self.idle_timeout / 4)
+        while True:
+            time.sleep(interval)
+            self.close_idle()
+
+
+document_pool = DocumentPool(
+    max_open=settings.document_pool_size,
+    idle_timeout=settings.document_pool_idle_timeout,
+)
@@ -1,8 +1,40 @@
+import asyncio
+import base64
+import bisect
+import fnmatch
+import hashlib
+import json
 import os
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from app.config import settings
 from app.schemas.file_browser import FileEntry, RootEntry
+from app.utils.cache import memory_cache
+
+memory_cache.register("dir_listing", weigher=lambda listing: listing.nbytes)
+
+# Rough per-entry overhead of a FileEntry on top of its name and path strings
+_ENTRY_OVERHEAD = 400
+
+
+@dataclass
+class DirectoryListing:
+    path: str
+    mtime_ns: int
+    entries: list[FileEntry]
+    # Sort keys of entries, for resuming a cursor with a binary search
+    keys: list[tuple] = field(repr=False)
+    etag: str
+    nbytes: int
+
+
+@dataclass
+class BrowsePage:
+    entries: list[FileEntry]
+    next_cursor: str | None
+    etag: str
 
 
 def get_roots() -> list[RootEntry]:
@@ -20,37 +52,208 @@ def get_roots() -> list[RootEntry]:
     ]
 
 
-def browse_directory(dir_path: str) -> list[FileEntry]:
+def browse_directory(
+    dir_path: str, cursor: str | None = None, limit: int | None = None
+) -> BrowsePage:
+    """Return one page of a directory: folders first, then PDFs, by name.
+
+    Without a limit the whole directory is returned. Pass the previous page's
+    next_cursor to continue; cursors point past an entry's sort key rather than
+    at an offset, so entries added meanwhile do not shift or repeat pages.
+    """
+    listing = get_directory_listing(dir_path)
+    start = 0
+    if cursor:
+        start = bisect.bisect_right(listing.keys, _decode_cursor(cursor))
+    stop = len(listing.entries) if limit is None else min(start + limit, len(listing.entries))
+
+    _refresh_pdf_stats(listing, start, stop)
+    next_cursor = None
+    if stop < len(listing.entries):
+        next_cursor = _encode_cursor(listing.keys[stop - 1])
+    etag = listing.etag
+    if cursor or limit is not None:
+        etag = _etag(f"{listing.etag}:{cursor}:{limit}")
+    return BrowsePage(entries=listing.entries[start:stop], next_cursor=next_cursor, etag=etag)
+
+
+def get_directory_listing(dir_path: str) -> DirectoryListing:
+    """The directory's sorted listing, cached until the directory's mtime changes.
+
+    A directory's mtime only changes when entries are added, removed or renamed;
+    browse_directory re-stats the PDFs it returns to catch files rewritten in place.
+    """
     path = Path(dir_path).resolve()
     home = Path.home().resolve()
 
-    if not str(path).startswith(str(home)):
+    if not path.is_relative_to(home):
         raise PermissionError("Access restricted to home directory")
 
-    if not path.is_dir():
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Directory not found: {path}")
+    if not os.path.isdir(path):
         raise FileNotFoundError(f"Directory not found: {path}")
 
-    entries: list[FileEntry] = []
+    listing = memory_cache.get("dir_listing", str(path))
+    if listing is not None and listing.mtime_ns == st.st_mtime_ns:
+        return listing
+
+    listing = _scan_directory(path, st.st_mtime_ns)
+    memory_cache.set("dir_listing", str(path), listing)
+    return listing
+
+
+def _refresh_pdf_stats(listing: DirectoryListing, start: int, stop: int) -> None:
+    # Only the returned entries are re-statted, so a cache hit stays proportional
+    # to the page size rather than the directory size
+    changed = False
+    for i in range(start, stop):
+        item = listing.entries[i]
+        if item.is_dir:
+            continue
+        try:
+            stat = os.stat(item.path)
+        except OSError:
+            continue  # Removed: the directory's mtime has changed too
+        if stat.st_size != item.size or stat.st_mtime != item.modified:
+            listing.entries[i] = item.model_copy(
+                update={"size": stat.st_size, "modified": stat.st_mtime}
+            )
+            changed = True
+    if changed:
+        listing.etag = _listing_etag(listing.entries)
+
+
+def _scan_directory(path: Path, mtime_ns: int) -> DirectoryListing:
+    keyed: list[tuple[tuple, FileEntry]] = []
     try:
-        for item in sorted(path.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower())):
-            if item.name.startswith("."):
-                continue
-            if item.is_dir():
-                entries.append(FileEntry(
-                    name=item.name,
-                    path=str(item),
-                    is_dir=True,
-                ))
-            elif item.suffix.lower() == ".pdf":
-                stat = item.stat()
-                entries.append(FileEntry(
-                    name=item.name,
-                    path=str(item),
-                    is_dir=False,
-                    size=stat.st_size,
-                    modified=stat.st_mtime,
-                ))
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    # is_dir() uses the type scandir already read; only PDFs need a stat
+                    if entry.is_dir():
+                        item = FileEntry(name=entry.name, path=entry.path, is_dir=True)
+                    elif entry.name.lower().endswith(".pdf"):
+                        stat = entry.stat()
+                        item = FileEntry(
+                            name=entry.name,
+                            path=entry.path,
+                            is_dir=False,
+                            size=stat.st_size,
+                            modified=stat.st_mtime,
+                        )
+                    else:
+                        continue
+                except OSError:
+                    continue
+                keyed.append(((not item.is_dir, item.name.lower(), item.name), item))
     except PermissionError:
         pass
 
-    return entries
+    keyed.sort(key=lambda k: k[0])
+    entries = [item for _, item in keyed]
+    return DirectoryListing(
+        path=str(path),
+        mtime_ns=mtime_ns,
+        entries=entries,
+        keys=[k for k, _ in keyed],
+        etag=_listing_etag(entries),
+        nbytes=sum(2 * (len(e.name) + len(e.path)) + _ENTRY_OVERHEAD for e in entries) + 256,
+    )
+
+
+def _listing_etag(entries: list[FileEntry]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for item in entries:
+        digest.update(f"{item.name}\0{int(item.is_dir)}\0{item.size}\0{item.modified}\n".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _etag(value: str) -> str:
+    return f'"{hashlib.blake2b(value.encode(), digest_size=16).hexdigest()}"'
+
+
+def _encode_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        is_file, lower, name = json.loads(base64.urlsafe_b64decode(padded))
+        return (bool(is_file), str(lower), str(name))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+async def discover_pdfs(
+    dir_path: str,
+    max_depth: int | None = None,
+    name_filter: str | None = None,
+    limit: int | None = None,
+) -> AsyncIterator[FileEntry]:
+    """Yield PDFs under dir_path as they are found, scanning directories concurrently.
+
+    max_depth 0 searches dir_path only. name_filter is a case-insensitive
+    substring, or a glob if it contains *, ? or [. Directories are listed through
+    the same cache as browse_directory. Closing the generator (e.g. when the
+    client disconnects) cancels the scans still queued.
+    """
+    root = await asyncio.to_thread(get_directory_listing, dir_path)
+    matches = _name_matcher(name_filter)
+    dirs: asyncio.Queue[tuple[str, int]] = asyncio.Queue()
+    found: asyncio.Queue[FileEntry | None] = asyncio.Queue(maxsize=1000)
+    visited = {root.path}
+    dirs.put_nowait((root.path, 0))
+
+    async def scan() -> None:
+        while True:
+            path, depth = await dirs.get()
+            try:
+                listing = await asyncio.to_thread(get_directory_listing, path)
+            except OSError:
+                # Unreadable, removed meanwhile, or a symlink leaving the home directory
+                dirs.task_done()
+                continue
+            for entry in listing.entries:
+                if not entry.is_dir:
+                    if matches(entry.name):
+                        await found.put(entry)
+                elif max_depth is None or depth < max_depth:
+                    # Resolve so symlink cycles are walked once
+                    sub = os.path.realpath(entry.path)
+                    if sub not in visited:
+                        visited.add(sub)
+                        dirs.put_nowait((sub, depth + 1))
+            dirs.task_done()
+
+    async def finish() -> None:
+        await dirs.join()
+        await found.put(None)
+
+    tasks = [asyncio.create_task(scan()) for _ in range(max(1, settings.discover_workers))]
+    tasks.append(asyncio.create_task(finish()))
+    try:
+        count = 0
+        while (entry := await found.get()) is not None:
+            yield entry
+            count += 1
+            if limit is not None and count >= limit:
+                return
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _name_matcher(name_filter: str | None) -> Callable[[str], bool]:
+    if not name_filter:
+        return lambda name: True
+    pattern = name_filter.lower()
+    if any(c in pattern for c in "*?["):
+        return lambda name: fnmatch.fnmatchcase(name.lower(), pattern)
+    return lambda name: pattern in name.lower()
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session
+from app.models.paper import LibraryDirectory, Paper
+from app.services.pdf_service import load_or_read_metadata
+from app.services.search_service import (
+    get_indexed_paths,
+    index_paper_text,
+    optimize_search_index,
+    remove_papers,
+)
+from app.services.worker_pool import run_pdf_job
+
+logger = logging.getLogger(__name__)
+
+_task: asyncio.Task | None = None
+_manual_scans: set[asyncio.Task] = set()
+_scan_lock = asyncio.Lock()
+_status: dict = {
+    "running": False,
+    "last_started": None,
+    "last_finished": None,
+    "last_result": None,
+    "error": "",
+}
+
+
+def get_library_root() -> Path:
+    return Path(settings.papers_root).expanduser().resolve()
+
+
+async def scan_library(full: bool = False) -> dict:
+    """Sync the papers table with PDFs under papers_root.
+
+    Incremental by default: a directory whose mtime is unchanged since the last
+    crawl is not listed again (its subdirectories are taken from the previous
+    crawl). Directory mtimes only change when entries are added, removed or
+    renamed, so pass full=True to also pick up PDFs rewritten in place.
+    """
+    async with _scan_lock:
+        _status.update(running=True, last_started=time.time(), error="")
+        try:
+            result = await _scan(get_library_root(), full)
+            _status["last_result"] = result
+            return result
+        except Exception as e:
+            _status["error"] = str(e)
+            raise
+        finally:
+            _status.update(running=False, last_finished=time.time())
+
+
+def request_scan(full: bool = False) -> bool:
+    """Start a scan in the background; False if one is already running."""
+    if _scan_lock.locked() or _manual_scans:
+        return False
+    task = asyncio.create_task(scan_library(full=full))
+    _manual_scans.add(task)
+    task.add_done_callback(_manual_scans.discard)
+    return True
+
+
+def get_scan_status() -> dict:
+    return {**_status, "root": str(get_library_root())}
+
+
+def start_library_indexer() -> None:
+    global _task
+    if settings.library_index_enabled and _task is None:
+        _task = asyncio.create_task(_run_periodically())
+
+
+async def stop_library_indexer() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
+
+
+async def record_paper_opened(db: AsyncSession, pdf_path: str) -> None:
+    path = str(Path(pdf_path).resolve())
+    paper = (await db.execute(select(Paper).where(Paper.file_path == path))).scalar_one_or_none()
+    if paper is None:
+        paper = Paper(file_path=path, directory=str(Path(path).parent), title=Path(path).stem)
+        db.add(paper)
+    paper.last_opened = datetime.utcnow()
+    paper.open_count = (paper.open_count or 0) + 1
+    await db.commit()
+
+
+async def _run_periodically() -> None:
+    full = True  # First crawl after start-up checks every file
+    while True:
+        try:
+            result = await scan_library(full=full)
+            logger.info("Library scan finished: %s", result)
+            full = False
+        except Exception:
+            logger.exception("Library scan failed")
+        await asyncio.sleep(settings.library_scan_interval)
+
+
+async def _scan(root: Path, full: bool) -> dict:
+    result = {
+        "directories": 0,
+        "listed": 0,
+        "added": 0,
+        "updated": 0,
+        "removed": 0,
+        "search_indexed": 0,
+    }
+    if not root.is_dir():
+        return result
+
+    async with async_session() as db:
+        known = {
+            d.path: d
+            for d in (await db.execute(select(LibraryDirectory))).scalars().all()
+        }
+        seen: set[str] = set()
+        pending = [str(root)]
+        sem = asyncio.Semaphore(max(1, settings.library_scan_workers))
+
+        while pending:
+            dir_path = pending.pop()
+            seen.add(dir_path)
+            result["directories"] += 1
+            try:
+                mtime = os.stat(dir_path).st_mtime
+            except OSError:
+                continue
+
+            record = known.get(dir_path)
+            if not full and record is not None and record.mtime == mtime:
+                pending.extend(json.loads(record.subdirs_json))
+                continue
+
+            subdirs, pdfs = await asyncio.to_thread(_list_directory, dir_path)
+            result["listed"] += 1
+            pending.extend(subdirs)
+            removed = await _sync_directory(db, dir_path, pdfs, sem, result)
+
+            if record is None:
+                record = LibraryDirectory(path=dir_path)
+                db.add(record)
+            record.mtime = mtime
+            record.subdirs_json = json.dumps(subdirs)
+            await db.commit()
+            # After the commit: the search index writes through its own session
+            await _update_search_index(list(pdfs), removed, sem, result)
+
+        # Directories that disappeared since the last crawl
+        gone = set(known) - seen
+        removed = []
+        for dir_path in gone:
+            removed += (
+                await db.execute(select(Paper.file_path).where(Paper.directory == dir_path))
+            ).scalars().all()
+            await db.execute(delete(Paper).where(Paper.directory == dir_path))
+            await db.delete(known[dir_path])
+        result["removed"] += len(removed)
+        await db.commit()
+        await _update_search_index([], removed, sem, result)
+
+    if result["search_indexed"]:
+        await optimize_search_index()
+    return result
+
+
+async def _update_search_index(
+    paths: list[str], removed: list[str], sem: asyncio.Semaphore, result: dict
+) -> None:
+    if not settings.search_index_enabled:
+        return
+    await remove_papers(removed)
+    if not settings.search_index_library:
+        # Only keep papers that were opened (and so indexed by pre-warm) up to date;
+        # extracting the text of every PDF under papers_root is opt-in
+        paths = list(await get_indexed_paths(paths))
+
+    async def index(path: str) -> None:
+        async with sem:
+            try:
+                if await index_paper_text(path):
+                    result["search_indexed"] += 1
+            except Exception as e:
+                logger.debug("Not indexing text of %s: %s", path, e)
+
+    await asyncio.gather(*(index(p) for p in paths))
+
+
+def _list_directory(dir_path: str) -> tuple[list[str], dict[str, os.stat_result]]:
+    subdirs: list[str] = []
+    pdfs: dict[str, os.stat_result] = {}
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.lower().endswith(".pdf") and entry.is_file():
+                        pdfs[entry.path] = entry.stat()
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return subdirs, pdfs
+
+
+async def _sync_directory(
+    db: AsyncSession,
+    dir_path: str,
+    pdfs: dict[str, os.stat_result],
+    sem: asyncio.Semaphore,
+    result: dict,
+) -> list[str]:
+    """Upsert this directory's PDFs into papers; returns the paths removed."""
+    rows = (
+        await db.execute(
+            select(Paper).where(or_(Paper.directory == dir_path, Paper.file_path.in_(pdfs)))
+        )
+    ).scalars().all()
+    existing = {p.file_path: p for p in rows}
+
+    removed = [path for path in existing if path not in pdfs]
+    for path in removed:
+        await db.delete(existing[path])
+    result["removed"] += len(removed)
+
+    changed = [
+        path
+        for path, stat in pdfs.items()
+        if path not in existing
+        or existing[path].file_size != stat.st_size
+        or existing[path].file_mtime != stat.st_mtime
+        or existing[path].indexed_at is None
+    ]
+
+    async def read_metadata(path: str) -> dict | None:
+        async with sem:
+            try:
+                return await run_pdf_job(load_or_read_metadata, path)
+            except Exception as e:
+                logger.debug("Skipping unreadable PDF %s: %s", path, e)
+                return None
+
+    metadata = await asyncio.gather(*(read_metadata(p) for p in changed))
+    now = datetime.utcnow()
+    for path, meta in zip(changed, metadata):
+        if meta is None:
+            continue
+        paper = existing.get(path)
+        if paper is None:
+            # Crawled papers have never been opened; open_count keeps them out of "recent"
+            paper = Paper(file_path=path, open_count=0, last_opened=now)
+            db.add(paper)
+            result["added"] += 1
+        else:
+            result["updated"] += 1
+        stat = pdfs[path]
+        paper.directory = dir_path
+        paper.title = meta["title"] or Path(path).stem
+        paper.author = meta["author"]
+        paper.page_count = meta["page_count"]
+        paper.file_size = stat.st_size
+        paper.file_mtime = stat.st_mtime
+        paper.indexed_at = now
+    return removed
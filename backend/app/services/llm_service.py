@@ -1,12 +1,12 @@
 import logging
 import os
 
-import httpx
 from collections.abc import AsyncGenerator
 
 from litellm import acompletion
 
 from app.config import settings
+from app.services.ollama_service import get_ollama_models, refresh_ollama_models
 
 logger = logging.getLogger(__name__)
 
@@ -25,25 +25,6 @@ def ensure_api_keys():
         os.environ.setdefault("ANTHROPIC_API_KEY", settings.anthropic_api_key)
 
 
-def _get_ollama_models() -> list[dict]:
-    """Fetch locally available Ollama models."""
-    try:
-        resp = httpx.get(f"{settings.ollama_base_url}/api/tags", timeout=3)
-        if resp.status_code == 200:
-            data = resp.json()
-            return [
-                {
-                    "id": f"ollama/{m['name']}",
-                    "name": f"{m['name']} (local)",
-                    "provider": "ollama",
-                }
-                for m in data.get("models", [])
-            ]
-    except (httpx.ConnectError, httpx.TimeoutException):
-        pass
-    return []
-
-
 async def stream_completion(
     model: str,
     messages: list[dict],
@@ -62,6 +43,9 @@ async def stream_completion(
     if model.startswith("ollama/"):
         kwargs["api_base"] = settings.ollama_base_url
         kwargs.pop("stream_options", None)
+        # Ollama otherwise runs with a 2k-4k window and silently truncates the prompt
+        if settings.ollama_num_ctx:
+            kwargs["num_ctx"] = settings.ollama_num_ctx
 
     response = await acompletion(**kwargs)
     async for chunk in response:
@@ -83,7 +67,7 @@ async def stream_completion_with_tracking(
     temperature: float = 0.3,
 ) -> AsyncGenerator[str, None]:
     """Wraps stream_completion to track token usage for authenticated users."""
-    from app.services.subscription_service import record_token_usage
+    from app.services.usage_service import record_usage
 
     total_tokens = 0
 
@@ -97,15 +81,16 @@ async def stream_completion_with_tracking(
             continue
         yield chunk
 
-    # Record usage after stream completes
+    # Record usage after stream completes (queued; sent to Supabase in the background)
     if user_id and total_tokens > 0 and not model.startswith("ollama/"):
-        try:
-            await record_token_usage(user_id, total_tokens, model)
-        except Exception:
-            logger.exception("Failed to record token usage")
+        record_usage(user_id, total_tokens, model)
+
 
+async def get_available_models(refresh: bool = False) -> list[dict]:
+    """Cloud models with configured keys plus the Ollama registry's local models.
 
-def get_available_models() -> list[dict]:
+    refresh=True checks Ollama now instead of using the registry's last result.
+    """
     models = []
 
     # Cloud models — always listed (gating happens in chat router based on tier)
@@ -115,7 +100,7 @@ def get_available_models() -> list[dict]:
         elif m["provider"] == "anthropic" and settings.anthropic_api_key:
             models.append(m)
 
-    # Local Ollama models (always check)
-    models.extend(_get_ollama_models())
+    # Local Ollama models (kept current by the registry in the background)
+    models.extend(await refresh_ollama_models() if refresh else await get_ollama_models())
 
     return models
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.config import settings
+from app.utils.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
+
+# How long a request waits for the very first refresh after start-up
+_FIRST_REFRESH_WAIT = 3.0
+
+_models: list[dict] = []
+_status = {
+    "available": False,
+    "models": 0,
+    "last_checked": None,
+    "last_success": None,
+    "consecutive_failures": 0,
+    "next_check_in": None,
+    "error": "",
+}
+_task: asyncio.Task | None = None
+_ready: asyncio.Event | None = None
+_lock: asyncio.Lock | None = None
+
+
+async def get_ollama_models() -> list[dict]:
+    """Locally available Ollama models, from the registry's last refresh.
+
+    Never waits on Ollama once the first refresh after start-up has finished.
+    Without a running registry (scripts, tests) it fetches directly.
+    """
+    if _task is None:
+        await refresh_ollama_models()
+    elif not _ready.is_set():
+        try:
+            await asyncio.wait_for(_ready.wait(), _FIRST_REFRESH_WAIT)
+        except TimeoutError:
+            pass
+    return list(_models)
+
+
+def get_ollama_status() -> dict:
+    return dict(_status)
+
+
+async def refresh_ollama_models() -> list[dict]:
+    """Fetch the installed models from Ollama now and update the registry."""
+    global _models, _lock
+    if _lock is None:
+        _lock = asyncio.Lock()
+    async with _lock:
+        _status["last_checked"] = time.time()
+        try:
+            resp = await get_http_client().get(
+                f"{settings.ollama_base_url}/api/tags", timeout=settings.ollama_timeout
+            )
+            resp.raise_for_status()
+            data = resp.json()
+        except (httpx.HTTPError, ValueError) as e:
+            _models = []
+            _status.update(
+                available=False,
+                models=0,
+                consecutive_failures=_status["consecutive_failures"] + 1,
+                error=str(e) or type(e).__name__,
+            )
+            return []
+
+        _models = [
+            {
+                "id": f"ollama/{m['name']}",
+                "name": f"{m['name']} (local)",
+                "provider": "ollama",
+            }
+            for m in data.get("models", [])
+        ]
+        _status.update(
+            available=True,
+            models=len(_models),
+            last_success=time.time(),
+            consecutive_failures=0,
+            error="",
+        )
+        return list(_models)
+
+
+def start_ollama_registry() -> None:
+    global _task, _ready
+    if _task is None:
+        _ready = asyncio.Event()
+        _task = asyncio.create_task(_run())
+
+
+async def stop_ollama_registry() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
+
+
+async def _run() -> None:
+    while True:
+        try:
+            await refresh_ollama_models()
+        except Exception:
+            logger.exception("Ollama model refresh failed")
+        _ready.set()
+
+        failures = _status["consecutive_failures"]
+        if failures:
+            # Ollama is not running: back off so an idle server does not keep polling
+            delay = min(
+                settings.ollama_refresh_interval * 2 ** min(failures - 1, 10),
+                settings.ollama_max_backoff,
+            )
+        else:
+            delay = settings.ollama_refresh_interval
+        _status["next_check_in"] = delay
+        await asyncio.sleep(delay)
@@ -1,33 +1,166 @@
+import multiprocessing
+from concurrent.futures import Executor
 from pathlib import Path
 
 import pymupdf
 
+from app.config import settings
+from app.services.document_pool import document_pool
+from app.services.text_store import (
+    load_object,
+    load_page,
+    load_pages,
+    save_object,
+    save_page,
+    save_pages,
+    write_atomic,
+)
+from app.services.worker_pool import get_shard_executor, get_shard_worker_count
+from app.utils.file_identity import FileIdentity, get_file_identity
 
-def extract_text(pdf_path: str, page_num: int | None = None) -> list[dict]:
+METADATA_KIND = "metadata"
+
+
+def extract_text(
+    pdf_path: str,
+    page_num: int | None = None,
+    start: int | None = None,
+    end: int | None = None,
+) -> list[dict]:
+    """Extract page text. Pass page_num, or a [start, end) range, to read only those pages."""
+    path = _check_pdf(pdf_path)
+    identity = get_file_identity(path, hash_content=settings.text_store_hash_content)
+    if page_num is not None:
+        start, end = page_num, page_num + 1
+    if start is not None or end is not None:
+        return _extract_range(path, identity, start or 0, end)
+
+    pages = load_pages(identity)
+    if pages is None:
+        pages = _extract_pages(path)
+        save_pages(identity, pages)
+        # Split into per-page entries while the text is at hand, so page
+        # requests never have to parse the full-document entry
+        for page in pages:
+            save_page(identity, page["page_num"], page["text"])
+    return pages
+
+
+def _check_pdf(pdf_path: str) -> Path:
     path = Path(pdf_path)
     if not path.exists() or path.suffix.lower() != ".pdf":
         raise FileNotFoundError(f"PDF not found: {pdf_path}")
+    return path
+
+
+def _extract_range(path: Path, identity: FileIdentity, start: int, end: int | None) -> list[dict]:
+    # Each page is looked up in the per-page store and only then extracted, so
+    # the cost depends on the pages requested, not the document length. The
+    # memory cache is left to the caller: this runs in the worker pool, which
+    # may be a separate process.
+    page_count = get_page_count(str(path))
+    end = page_count if end is None else min(end, page_count)
+    wanted = range(max(start, 0), end)
+
+    texts: dict[int, str] = {}
+    for i in wanted:
+        text = load_page(identity, i)
+        if text is not None:
+            texts[i] = text
+
+    missing = [i for i in wanted if i not in texts]
+    if missing:
+        stored = load_pages(identity)
+        if stored is not None:
+            # A full entry saved without per-page files: keep only the pages asked for
+            for i in missing:
+                texts[i] = stored[i]["text"]
+                save_page(identity, i, texts[i])
+        else:
+            with document_pool.borrow(path) as doc:
+                for i in missing:
+                    texts[i] = doc.load_page(i).get_text("text", sort=True)
+                    save_page(identity, i, texts[i])
+
+    return [{"page_num": i, "text": texts[i]} for i in wanted]
+
+
+def get_page_count(pdf_path: str) -> int:
+    path = _check_pdf(pdf_path)
+    with document_pool.borrow(path) as doc:
+        return len(doc)
+
+
+def read_page(pdf_path: str, identity: FileIdentity, page_num: int) -> str:
+    """Text of one page from the per-page store, or the PDF. Blocking.
+
+    Never reads the full-document entry, so streaming a long paper page by
+    page keeps memory flat.
+    """
+    text = load_page(identity, page_num)
+    if text is None:
+        with document_pool.borrow(Path(pdf_path)) as doc:
+            text = doc.load_page(page_num).get_text("text", sort=True)
+        save_page(identity, page_num, text)
+    return text
+
+
+def _extract_pages(path: Path) -> list[dict]:
+    workers = get_shard_worker_count()
+    with document_pool.borrow(path) as doc:
+        page_count = len(doc)
+        # Shard only large documents, and never from inside a pool worker process
+        if (
+            page_count < settings.parallel_extract_min_pages
+            or workers < 2
+            or multiprocessing.parent_process() is not None
+        ):
+            pages = []
+            for i, page in enumerate(doc):
+                text = page.get_text("text", sort=True)
+                pages.append({"page_num": i, "text": text})
+            return pages
+
+    return extract_pages_sharded(str(path), page_count, get_shard_executor(), workers)
+
+
+def extract_pages_sharded(
+    pdf_path: str, page_count: int, executor: Executor, shard_count: int
+) -> list[dict]:
+    """Extract contiguous page ranges concurrently and reassemble them in page order."""
+    shard_count = max(1, min(shard_count, page_count))
+    step, extra = divmod(page_count, shard_count)
+    bounds = []
+    start = 0
+    for i in range(shard_count):
+        end = start + step + (1 if i < extra else 0)
+        bounds.append((start, end))
+        start = end
 
-    doc = pymupdf.open(str(path))
+    futures = [executor.submit(_extract_page_range, pdf_path, s, e) for s, e in bounds]
     pages = []
-    for i, page in enumerate(doc):
-        if page_num is not None and i != page_num:
-            continue
-        text = page.get_text("text", sort=True)
-        pages.append({"page_num": i, "text": text})
-    doc.close()
+    for future in futures:
+        pages.extend(future.result())
     return pages
 
 
+def _extract_page_range(pdf_path: str, start: int, end: int) -> list[dict]:
+    # Runs in a shard worker process, which keeps its own pool of open documents
+    with document_pool.borrow(pdf_path) as doc:
+        return [
+            {"page_num": i, "text": doc[i].get_text("text", sort=True)}
+            for i in range(start, end)
+        ]
+
+
 def get_metadata(pdf_path: str) -> dict:
     path = Path(pdf_path)
     if not path.exists():
         raise FileNotFoundError(f"PDF not found: {pdf_path}")
 
-    doc = pymupdf.open(str(path))
-    meta = doc.metadata or {}
-    page_count = len(doc)
-    doc.close()
+    with document_pool.borrow(path) as doc:
+        meta = doc.metadata or {}
+        page_count = len(doc)
 
     return {
         "page_count": page_count,
@@ -37,6 +170,63 @@ def get_metadata(pdf_path: str) -> dict:
     }
 
 
+def load_or_read_metadata(pdf_path: str) -> dict:
+    """get_metadata, persisted in the text store next to the extracted text."""
+    identity = get_file_identity(pdf_path, hash_content=settings.text_store_hash_content)
+    metadata = load_object(METADATA_KIND, identity)
+    if metadata is None:
+        metadata = get_metadata(pdf_path)
+        save_object(METADATA_KIND, identity, metadata)
+    return metadata
+
+
+def get_toc(pdf_path: str) -> list:
+    """Return the outline as [level, title, page] rows (page is 1-based)."""
+    path = Path(pdf_path)
+    if not path.exists():
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+
+    with document_pool.borrow(path) as doc:
+        return doc.get_toc(simple=True)
+
+
 def get_full_text(pdf_path: str) -> str:
     pages = extract_text(pdf_path)
     return "\n\n".join(p["text"] for p in pages)
+
+
+# Longest side of a rendered page, whatever the requested scale
+MAX_RENDER_PIXELS = 6000
+
+
+def render_page(
+    pdf_path: str,
+    page_num: int,
+    dest: str,
+    scale: float | None = None,
+    width: int | None = None,
+    fmt: str = "png",
+) -> int:
+    """Rasterize one page to an image file at dest; returns its size in bytes.
+
+    Pass scale (1.0 = 72 dpi) or a target width in pixels. Runs in the render
+    process pool, and writes the file itself so the image is not copied back
+    through the pool.
+    """
+    path = Path(pdf_path)
+    if not path.exists():
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+
+    with document_pool.borrow(path) as doc:
+        if not 0 <= page_num < len(doc):
+            raise ValueError(f"Page {page_num} out of range (0-{len(doc) - 1})")
+        page = doc[page_num]
+        rect = page.rect
+        if width is not None:
+            scale = width / rect.width
+        scale = min(scale or 1.0, MAX_RENDER_PIXELS / max(rect.width, rect.height))
+        pix = page.get_pixmap(matrix=pymupdf.Matrix(scale, scale), alpha=False)
+
+    data = pix.tobytes("jpeg", jpg_quality=85) if fmt == "jpeg" else pix.tobytes("png")
+    write_atomic(Path(dest), data)
+    return len(data)
@@ -0,0 +1,211 @@
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+
+from app.config import settings
+from app.services.context_service import (
+    get_paper_index,
+    get_paper_text,
+    get_paper_token_count,
+    get_retrieval_threshold,
+)
+from app.services.search_service import index_paper_text
+from app.utils.file_identity import get_file_identity, get_file_identity_async
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first
+PRIORITY_OPEN = 1  # The viewer just loaded the PDF
+PRIORITY_METADATA = 2
+
+STEPS = ("text", "tokens", "index", "search")
+_ACTIVE = ("queued", "running")
+_MAX_FINISHED_JOBS = 100
+
+
+@dataclass
+class PrewarmJob:
+    key: str
+    path: str
+    priority: int
+    status: str = "queued"
+    step: str = ""
+    steps_done: int = 0
+    error: str = ""
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    # Set once text, tokens and index are cached (everything chat needs)
+    context_ready: asyncio.Event = field(default_factory=asyncio.Event)
+    task: asyncio.Task | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "status": self.status,
+            "priority": self.priority,
+            "step": self.step,
+            "steps_done": self.steps_done,
+            "steps_total": len(STEPS),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+_jobs: dict[str, PrewarmJob] = {}
+_queue: asyncio.PriorityQueue | None = None
+_workers: list[asyncio.Task] = []
+_seq = itertools.count()
+
+
+def start_prewarm_workers() -> None:
+    global _queue
+    if not settings.prewarm_enabled or _workers:
+        return
+    _queue = asyncio.PriorityQueue()
+    for _ in range(max(1, settings.prewarm_workers)):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop_prewarm_workers() -> None:
+    global _queue
+    for job in _jobs.values():
+        if job.task is not None:
+            job.task.cancel()
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _jobs.clear()
+    _queue = None
+
+
+def schedule_prewarm(pdf_path: str, priority: int = PRIORITY_OPEN) -> PrewarmJob | None:
+    """Queue extraction, tokenization and indexing of a paper. Deduplicated per file version."""
+    if _queue is None:
+        return None
+    try:
+        # Jobs are keyed by path, size and mtime: hashing content here would block the loop
+        identity = get_file_identity(pdf_path)
+    except OSError:
+        return None
+
+    job = _jobs.get(identity.key)
+    if job is not None and job.status in _ACTIVE:
+        _raise_priority(job, priority)
+        return job
+
+    job = PrewarmJob(key=identity.key, path=identity.path, priority=priority)
+    _jobs[job.key] = job
+    _queue.put_nowait((priority, next(_seq), job.key))
+    _prune_finished()
+    return job
+
+
+async def wait_for_prewarm(pdf_path: str) -> None:
+    """If a job for this paper is running, wait until its chat context is cached.
+
+    A queued job is left alone: the caller's own extraction is coalesced with
+    it by single_flight, so waiting behind other papers' jobs would only add latency.
+    """
+    try:
+        identity = get_file_identity(pdf_path)
+    except OSError:
+        return
+    job = _jobs.get(identity.key)
+    if job is None or job.status != "running":
+        return
+    await job.context_ready.wait()
+
+
+def cancel_prewarm(pdf_path: str) -> bool:
+    try:
+        identity = get_file_identity(pdf_path)
+    except OSError:
+        return False
+    job = _jobs.get(identity.key)
+    if job is None or job.status not in _ACTIVE:
+        return False
+    if job.task is not None:
+        job.task.cancel()
+    else:
+        _finish(job, "cancelled")
+    return True
+
+
+def get_prewarm_jobs() -> list[dict]:
+    return [job.to_dict() for job in sorted(_jobs.values(), key=lambda j: j.created_at)]
+
+
+def _raise_priority(job: PrewarmJob, priority: int) -> None:
+    # PriorityQueue can't reorder in place; push a new entry and let the worker skip the stale one
+    if job.status == "queued" and priority < job.priority and _queue is not None:
+        job.priority = priority
+        _queue.put_nowait((priority, next(_seq), job.key))
+
+
+async def _worker() -> None:
+    while True:
+        priority, _, key = await _queue.get()
+        job = _jobs.get(key)
+        if job is None or job.status != "queued" or job.priority != priority:
+            continue
+        # Each job gets its own task so cancelling it leaves the worker running
+        job.task = asyncio.create_task(_run(job))
+        await asyncio.wait([job.task])
+
+
+async def _run(job: PrewarmJob) -> None:
+    job.status = "running"
+    job.started_at = time.time()
+    try:
+        identity = await get_file_identity_async(
+            job.path, hash_content=settings.text_store_hash_content
+        )
+
+        job.step = "text"
+        await get_paper_text(job.path, identity)
+        job.steps_done = 1
+
+        job.step = "tokens"
+        token_count = await get_paper_token_count(job.path, identity)
+        job.steps_done = 2
+
+        job.step = "index"
+        # Only papers over the smallest context budget ever go through retrieval
+        if token_count >= get_retrieval_threshold():
+            await get_paper_index(job.path, identity)
+        job.steps_done = 3
+        job.context_ready.set()
+
+        job.step = "search"
+        await index_paper_text(job.path, identity)
+        job.steps_done = 4
+        _finish(job, "done")
+    except asyncio.CancelledError:
+        _finish(job, "cancelled")
+    except Exception as e:
+        logger.exception("Pre-warm failed for %s", job.path)
+        job.error = str(e)
+        _finish(job, "failed")
+
+
+def _finish(job: PrewarmJob, status: str) -> None:
+    job.status = status
+    job.step = ""
+    job.finished_at = time.time()
+    job.context_ready.set()
+    job.done.set()
+
+
+def _prune_finished() -> None:
+    finished = [j for j in _jobs.values() if j.status not in _ACTIVE]
+    if len(finished) > _MAX_FINISHED_JOBS:
+        finished.sort(key=lambda j: j.finished_at or 0)
+        for job in finished[: len(finished) - _MAX_FINISHED_JOBS]:
+            del _jobs[job.key]
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from app.config import settings
+from app.services.pdf_service import render_page
+from app.services.worker_pool import get_render_executor, run_pdf_job
+from app.utils.file_identity import FileIdentity, get_file_identity_async
+from app.utils.singleflight import single_flight
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """Disk cache of rendered page images, bounded by total file size (LRU).
+
+    Files live under <cache_dir>/renders and are named after the file identity,
+    page and scale, so a changed PDF never hits stale images. Recency is kept in
+    memory and mirrored to file mtimes, so the LRU order survives restarts.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._files: OrderedDict[str, int] = OrderedDict()  # path -> size, oldest first
+        self._total_bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def root(self) -> Path:
+        return settings.get_cache_dir() / "renders"
+
+    def path_for(self, identity: FileIdentity, page_num: int, variant: str, fmt: str) -> Path:
+        key = identity.key
+        return self.root / key[:2] / f"{key}-{page_num}-{variant}.{fmt}"
+
+    def get(self, path: Path) -> Path | None:
+        with self._lock:
+            self._load()
+            size = self._files.get(str(path))
+            if size is None or not path.exists():
+                if size is not None:
+                    self._forget(str(path))
+                self.misses += 1
+                return None
+            self._files.move_to_end(str(path))
+            self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def add(self, path: Path, size: int) -> None:
+        with self._lock:
+            self._load()
+            self._forget(str(path))
+            self._files[str(path)] = size
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and len(self._files) > 1:
+                oldest, _ = next(iter(self._files.items()))
+                self._forget(oldest)
+                Path(oldest).unlink(missing_ok=True)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._load()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "files": len(self._files),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _forget(self, path: str) -> None:
+        size = self._files.pop(path, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _load(self) -> None:
+        # Pick up images rendered by previous runs, least recently used first
+        if self._loaded:
+            return
+        self._loaded = True
+        found = []
+        for dir_path, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(dir_path, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found.append((st.st_mtime, path, st.st_size))
+        for _, path, size in sorted(found):
+            self._files[path] = size
+            self._total_bytes += size
+        logger.debug("Render cache: %d files, %d bytes", len(self._files), self._total_bytes)
+
+
+render_cache = RenderCache(settings.render_cache_max_bytes)
+
+
+async def get_rendered_page(
+    pdf_path: str,
+    page_num: int,
+    scale: float | None = None,
+    width: int | None = None,
+    fmt: str = "png",
+) -> Path:
+    """Path of the rendered page image, rendering it in the render pool on a miss."""
+    identity = await get_file_identity_async(
+        pdf_path, hash_content=settings.text_store_hash_content
+    )
+    if width is not None:
+        variant = f"w{width}"
+    else:
+        # Quantize so near-identical zoom levels share one image
+        percent = round((scale or 1.0) * 100)
+        scale, variant = percent / 100, f"s{percent}"
+    path = render_cache.path_for(identity, page_num, variant, fmt)
+
+    cached = await asyncio.to_thread(render_cache.get, path)
+    if cached is not None:
+        return cached
+
+    async def render() -> Path:
+        size = await run_pdf_job(
+            render_page,
+            pdf_path,
+            page_num,
+            str(path),
+            scale,
+            width,
+            fmt,
+            executor=get_render_executor(),
+        )
+        await asyncio.to_thread(render_cache.add, path, size)
+        return path
+
+    return await single_flight.do("render", str(path), render)
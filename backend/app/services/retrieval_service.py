@@ -0,0 +1,228 @@
+import re
+import sys
+from collections import Counter
+from functools import cached_property
+
+import numpy as np
+
+from app.config import settings
+from app.services.chunk_service import Chunk, chunk_pages, format_chunk
+from app.services.pdf_service import extract_text, get_toc
+from app.services.text_store import load_object, save_object
+from app.utils.file_identity import get_file_identity
+
+# Bump when chunking or index layout changes, so stale on-disk indexes are ignored
+INDEX_VERSION = 3
+
+# Allowance for the "[Pages a-b, section]" header added to each chunk in the prompt
+_CHUNK_HEADER_TOKENS = 16
+
+# Same token pattern as sklearn's TfidfVectorizer, so both engines see the same terms
+_TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")
+
+# Compact English stop list; avoids importing sklearn just for its list
+STOP_WORDS = frozenset(
+    """
+    about above after again against all also am an and any are as at be because been before
+    being below between both but by can could did do does doing down during each few for from
+    further had has have having he her here hers herself him himself his how however if in into
+    is it its itself just me more most my myself no nor not now of off on once only or other
+    our ours ourselves out over own same she should so some such than that the their theirs
+    them themselves then there these they this those through thus to too under until up upon
+    very was we were what when where which while who whom why will with within without would
+    you your yours yourself yourselves
+    """.split()
+)
+
+
+class _ChunkIndex:
+    """Base for retrieval indexes: a paper's chunks, with token counts and page provenance."""
+
+    def __init__(self, chunks: list[Chunk]):
+        self.chunks = chunks
+
+    @cached_property
+    def min_chunk_tokens(self) -> int:
+        return min((c.token_count for c in self.chunks), default=1)
+
+    def _chunks_nbytes(self) -> int:
+        return sum(sys.getsizeof(c.text) + 200 for c in self.chunks)
+
+
+class TfidfIndex(_ChunkIndex):
+    """Chunks of one paper with a TF-IDF vectorizer fitted once over them.
+
+    Queries only transform the query and take a sparse dot product against the
+    precomputed chunk matrix (rows are L2-normalised, so this is cosine similarity).
+    """
+
+    engine = "tfidf"
+
+    def __init__(self, chunks: list[Chunk]):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        super().__init__(chunks)
+        self.vectorizer = TfidfVectorizer(stop_words="english")
+        self.matrix = None
+        if chunks:
+            try:
+                self.matrix = self.vectorizer.fit_transform([c.text for c in chunks])
+            except ValueError:
+                pass  # Empty vocabulary: the chunks hold only stop words or no words at all
+
+    def search(self, query: str, top_k: int) -> list[int]:
+        """Return indices of the top_k chunks most similar to query, best first."""
+        if self.matrix is None:
+            return []
+        query_vec = self.vectorizer.transform([query])
+        if not query_vec.nnz:
+            return []
+        similarities = (self.matrix @ query_vec.T).toarray().ravel()
+        k = min(top_k, len(similarities))
+        top = np.argpartition(similarities, len(similarities) - k)[-k:]
+        return list(top[np.argsort(similarities[top])[::-1]])
+
+    @property
+    def nbytes(self) -> int:
+        size = self._chunks_nbytes()
+        if self.matrix is not None:
+            m = self.matrix
+            size += m.data.nbytes + m.indices.nbytes + m.indptr.nbytes
+            # Vocabulary dict + idf vector; ~100 bytes per term is a fair estimate
+            size += len(self.vectorizer.vocabulary_) * 100
+        return size
+
+
+class BM25Index(_ChunkIndex):
+    """Okapi BM25 over a paper's chunks, backed by a compact inverted index.
+
+    Postings for all terms live in two flat arrays (chunk ids and precomputed
+    per-posting BM25 weights) sliced by term offsets, so scoring a query is a
+    handful of vectorised NumPy adds with no sklearn import.
+    """
+
+    engine = "bm25"
+
+    def __init__(self, chunks: list[Chunk], k1: float = 1.5, b: float = 0.75):
+        super().__init__(chunks)
+        self.vocabulary: dict[str, int] = {}
+
+        term_ids: list[int] = []
+        doc_ids: list[int] = []
+        tfs: list[int] = []
+        doc_lens = np.zeros(len(chunks), dtype=np.float32)
+        for doc_id, chunk in enumerate(chunks):
+            counts = Counter(_tokenize(chunk.text))
+            doc_lens[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+
+        term_arr = np.asarray(term_ids, dtype=np.int32)
+        order = np.argsort(term_arr, kind="stable")
+        self.postings = np.asarray(doc_ids, dtype=np.int32)[order]
+        tf_arr = np.asarray(tfs, dtype=np.float32)[order]
+
+        df = np.bincount(term_arr, minlength=len(self.vocabulary))
+        self.offsets = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(df, out=self.offsets[1:])
+
+        n_docs = len(chunks)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = float(doc_lens.mean()) if n_docs and doc_lens.any() else 1.0
+        norm = k1 * (1 - b + b * doc_lens[self.postings] / avgdl)
+        term_of_posting = np.repeat(np.arange(len(self.vocabulary)), df)
+        self.weights = (idf[term_of_posting] * tf_arr * (k1 + 1) / (tf_arr + norm)).astype(
+            np.float32
+        )
+
+    def search(self, query: str, top_k: int) -> list[int]:
+        """Return indices of the top_k highest-scoring chunks, best first."""
+        term_ids = {self.vocabulary[t] for t in _tokenize(query) if t in self.vocabulary}
+        if not term_ids:
+            return []
+
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # A term has at most one posting per chunk, so fancy-index add is safe
+            scores[self.postings[start:end]] += self.weights[start:end]
+
+        k = min(top_k, len(scores))
+        top = np.argpartition(scores, len(scores) - k)[-k:]
+        return list(top[np.argsort(scores[top])[::-1]])
+
+    @property
+    def nbytes(self) -> int:
+        size = self._chunks_nbytes()
+        size += self.postings.nbytes + self.weights.nbytes + self.offsets.nbytes
+        return size + len(self.vocabulary) * 100
+
+
+RetrievalIndex = TfidfIndex | BM25Index
+
+_ENGINES = {"tfidf": TfidfIndex, "bm25": BM25Index}
+
+
+def build_index(
+    pages: list[dict], toc: list | None = None, engine: str | None = None
+) -> RetrievalIndex:
+    index_cls = _ENGINES[engine or settings.retrieval_engine]
+    return index_cls(chunk_pages(pages, toc))
+
+
+def load_or_build_index(pdf_path: str) -> RetrievalIndex:
+    """Load the paper's index from disk, or build and persist it. Blocking."""
+    identity = get_file_identity(pdf_path, hash_content=settings.text_store_hash_content)
+    kind = get_index_kind()
+    index = load_object(kind, identity)
+    if index is None:
+        index = build_index(extract_text(pdf_path), get_toc(pdf_path))
+        save_object(kind, identity, index)
+    return index
+
+
+def retrieve_relevant_chunks(index: RetrievalIndex, query: str, token_budget: int) -> str:
+    """Fill token_budget with the best-ranked chunks, then return them in document order."""
+    n_chunks = len(index.chunks)
+    # Enough candidates to fill the budget with the shortest chunks; widened only
+    # when chunks too large for what was left of the budget had to be skipped
+    top_k = token_budget // (index.min_chunk_tokens + _CHUNK_HEADER_TOKENS) + 1
+    while True:
+        ranked = index.search(query, top_k) if query else []
+        if not ranked:
+            ranked = range(n_chunks)
+        selected, filled = _fill_budget(index, ranked, token_budget)
+        if filled or len(ranked) >= n_chunks or top_k >= n_chunks:
+            break
+        top_k *= 2
+
+    return "\n\n".join(format_chunk(index.chunks[i]) for i in sorted(selected))
+
+
+def _fill_budget(
+    index: RetrievalIndex, ranked, token_budget: int
+) -> tuple[list[int], bool]:
+    """Take ranked chunks that still fit; also returns whether the budget was filled."""
+    selected = []
+    remaining = token_budget
+    for i in ranked:
+        cost = index.chunks[i].token_count + _CHUNK_HEADER_TOKENS
+        if cost <= remaining:
+            selected.append(i)
+            remaining -= cost
+            if remaining < index.min_chunk_tokens + _CHUNK_HEADER_TOKENS:
+                return selected, True
+    return selected, False
+
+
+def get_index_kind() -> str:
+    return (
+        f"index-{settings.retrieval_engine}-{settings.chunk_max_tokens}"
+        f"-{settings.chunk_overlap_tokens}-v{INDEX_VERSION}"
+    )
+
+
+def _tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
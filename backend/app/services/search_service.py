@@ -0,0 +1,223 @@
+import logging
+import re
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import delete, select, text
+
+from app.config import settings
+from app.database import async_session, engine
+from app.models.search import SearchDocument
+from app.services.context_service import get_paper_pages
+from app.services.pdf_service import load_or_read_metadata
+from app.services.worker_pool import run_pdf_job
+from app.utils.file_identity import FileIdentity, get_file_identity_async
+
+logger = logging.getLogger(__name__)
+
+# Page rows live at rowid (document id << PAGE_BITS) | page_num, so a paper's
+# pages are one contiguous rowid range and can be replaced without a table scan.
+PAGE_BITS = 20
+_MAX_PAGES = 1 << PAGE_BITS
+
+# Snippet delimiters: control characters that never appear in extracted text,
+# turned into highlight offsets so clients never have to parse markup.
+_HL_START, _HL_END = "\x02", "\x03"
+_SNIPPET_TOKENS = 24
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+async def init_search_index() -> None:
+    # create_all cannot create virtual tables
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS paper_pages_fts "
+            "USING fts5(content, tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+
+
+async def index_paper_text(pdf_path: str, identity: FileIdentity | None = None) -> bool:
+    """Add or refresh a paper's pages in the full-text index.
+
+    Papers already indexed at this file version are skipped, so calling this on
+    every open or library scan is cheap. Returns True if the index was changed.
+    """
+    if not settings.search_index_enabled:
+        return False
+    path = str(Path(pdf_path).resolve())
+    identity = identity or await get_file_identity_async(
+        path, hash_content=settings.text_store_hash_content
+    )
+
+    async with async_session() as db:
+        doc = (
+            await db.execute(select(SearchDocument).where(SearchDocument.file_path == path))
+        ).scalar_one_or_none()
+        if doc is not None and doc.file_key == identity.key:
+            return False
+
+    # Text comes from the text store when the paper was extracted before
+    pages = await get_paper_pages(path, identity)
+    metadata = await run_pdf_job(load_or_read_metadata, path)
+    rows = [
+        {"page_num": p["page_num"], "content": p["text"]}
+        for p in pages
+        if p["text"].strip() and p["page_num"] < _MAX_PAGES
+    ]
+
+    async with async_session() as db:
+        doc = (
+            await db.execute(select(SearchDocument).where(SearchDocument.file_path == path))
+        ).scalar_one_or_none()
+        if doc is None:
+            doc = SearchDocument(file_path=path)
+            db.add(doc)
+            await db.flush()
+        else:
+            await _delete_pages(db, doc.id)
+        doc.file_key = identity.key
+        doc.title = metadata["title"] or Path(path).stem
+        doc.page_count = len(pages)
+        doc.indexed_at = datetime.utcnow()
+
+        base = doc.id << PAGE_BITS
+        if rows:
+            await db.execute(
+                text("INSERT INTO paper_pages_fts (rowid, content) VALUES (:rowid, :content)"),
+                [{"rowid": base | r["page_num"], "content": r["content"]} for r in rows],
+            )
+        await db.commit()
+    return True
+
+
+async def get_indexed_paths(paths: list[str]) -> set[str]:
+    """The subset of paths that already have a document in the index."""
+    if not paths:
+        return set()
+    async with async_session() as db:
+        return set(
+            (
+                await db.execute(
+                    select(SearchDocument.file_path).where(SearchDocument.file_path.in_(paths))
+                )
+            ).scalars().all()
+        )
+
+
+async def remove_papers(paths: list[str]) -> None:
+    if not paths:
+        return
+    async with async_session() as db:
+        docs = (
+            await db.execute(select(SearchDocument).where(SearchDocument.file_path.in_(paths)))
+        ).scalars().all()
+        for doc in docs:
+            await _delete_pages(db, doc.id)
+        await db.execute(delete(SearchDocument).where(SearchDocument.file_path.in_(paths)))
+        await db.commit()
+
+
+async def optimize_search_index() -> None:
+    """Merge the FTS b-trees into one; worth doing after a large batch of updates."""
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql(
+            "INSERT INTO paper_pages_fts (paper_pages_fts) VALUES ('optimize')"
+        )
+
+
+async def search_pages(query: str, limit: int = 20, offset: int = 0) -> dict:
+    """Rank pages matching every word of the query (the last word as a prefix)."""
+    match = to_match_query(query)
+    if not match:
+        return {"query": query, "results": [], "offset": offset, "limit": limit, "has_more": False}
+
+    async with async_session() as db:
+        rows = (
+            await db.execute(
+                text(
+                    "SELECT f.rowid, bm25(paper_pages_fts) AS score, "
+                    "snippet(paper_pages_fts, 0, :hl_start, :hl_end, '…', :tokens) AS snippet, "
+                    "d.file_path, d.title "
+                    "FROM paper_pages_fts AS f "
+                    f"JOIN search_documents AS d ON d.id = (f.rowid >> {PAGE_BITS}) "
+                    "WHERE paper_pages_fts MATCH :match "
+                    "ORDER BY rank LIMIT :limit OFFSET :offset"
+                ),
+                {
+                    "match": match,
+                    "hl_start": _HL_START,
+                    "hl_end": _HL_END,
+                    "tokens": _SNIPPET_TOKENS,
+                    # One extra row tells us whether there is a next page
+                    "limit": limit + 1,
+                    "offset": offset,
+                },
+            )
+        ).all()
+
+    results = []
+    for rowid, score, snippet, file_path, title in rows[:limit]:
+        snippet_text, highlights = _split_highlights(snippet)
+        results.append(
+            {
+                "path": file_path,
+                "title": title,
+                "page_num": rowid & (_MAX_PAGES - 1),
+                "snippet": snippet_text,
+                "highlights": highlights,
+                # bm25() is lower-is-better; flip it so clients can sort descending
+                "score": -score,
+            }
+        )
+    return {
+        "query": query,
+        "results": results,
+        "offset": offset,
+        "limit": limit,
+        "has_more": len(rows) > limit,
+    }
+
+
+async def get_search_stats() -> dict:
+    if not settings.search_index_enabled:
+        return {"enabled": False, "papers": 0, "pages": 0}
+    async with async_session() as db:
+        papers = (await db.execute(text("SELECT count(*) FROM search_documents"))).scalar()
+        pages = (await db.execute(text("SELECT count(*) FROM paper_pages_fts"))).scalar()
+    return {"enabled": True, "papers": papers, "pages": pages}
+
+
+def to_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query, so user input is never parsed as FTS syntax."""
+    words = _WORD_RE.findall(query)
+    if not words:
+        return ""
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+async def _delete_pages(db, doc_id: int) -> None:
+    await db.execute(
+        text("DELETE FROM paper_pages_fts WHERE rowid >= :lo AND rowid < :hi"),
+        {"lo": doc_id << PAGE_BITS, "hi": (doc_id + 1) << PAGE_BITS},
+    )
+
+
+def _split_highlights(snippet: str) -> tuple[str, list[list[int]]]:
+    parts = []
+    highlights = []
+    length = 0
+    start = None
+    for chunk in re.split(f"([{_HL_START}{_HL_END}])", snippet):
+        if chunk == _HL_START:
+            start = length
+        elif chunk == _HL_END:
+            if start is not None:
+                highlights.append([start, length])
+            start = None
+        else:
+            parts.append(chunk)
+            length += len(chunk)
+    return "".join(parts), highlights
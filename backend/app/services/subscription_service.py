@@ -3,9 +3,22 @@ import logging
 import httpx
 
 from app.config import settings
+from app.utils.cache import memory_cache
+from app.utils.http_client import get_http_client
+from app.utils.singleflight import single_flight
 
 logger = logging.getLogger(__name__)
 
+# Subscriptions change rarely (checkout, renewal); usage is kept current locally
+memory_cache.register("subscription", weigher=lambda _: 1024, ttl=settings.subscription_cache_ttl)
+
+# Tokens counted locally but not yet recorded in Supabase, per user
+_pending_tokens: dict[str, int] = {}
+
+# Statuses for which usage is dropped: PostgREST answers an exception raised by
+# the RPC (e.g. no active subscription) with 400. Anything else is kept and retried.
+_USAGE_REJECTED_STATUSES = {400, 409, 422}
+
 # Tier → allowed model prefixes
 TIER_MODELS = {
     "basic": [],  # Ollama only (no cloud models)
@@ -27,32 +40,59 @@ def _supabase_headers() -> dict:
     }
 
 
-async def get_user_subscription(user_id: str) -> dict | None:
-    """Fetch user's subscription + current token usage from Supabase."""
+async def get_user_subscription(user_id: str, refresh: bool = False) -> dict | None:
+    """User's subscription + current token usage, cached for subscription_cache_ttl.
+
+    tokens_used includes usage still being recorded, so gating on the cached
+    value never lags behind the user's own requests.
+    """
     if not settings.supabase_url or not settings.supabase_service_key:
         return None
 
+    sub = None
+    if settings.subscription_cache_ttl > 0 and not refresh:
+        sub = memory_cache.get("subscription", user_id)
+    if sub is None:
+        sub = await single_flight.do(
+            "subscription", user_id, lambda: _fetch_subscription(user_id)
+        )
+        if sub is None:
+            return None
+        if settings.subscription_cache_ttl > 0:
+            memory_cache.set("subscription", user_id, sub)
+
+    pending = _pending_tokens.get(user_id, 0)
+    return {**sub, "tokens_used": sub.get("tokens_used", 0) + pending}
+
+
+def invalidate_user_subscription(user_id: str | None = None) -> None:
+    """Drop a user's cached subscription (or everyone's), e.g. after a plan change."""
+    memory_cache.invalidate("subscription", user_id)
+
+
+async def _fetch_subscription(user_id: str) -> dict | None:
+    """Fetch user's subscription + current token usage from Supabase."""
     url = f"{settings.supabase_url}/rest/v1/subscriptions"
     params = {"user_id": f"eq.{user_id}", "select": "*"}
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, headers=_supabase_headers(), params=params, timeout=10)
-        if resp.status_code != 200:
-            logger.error("Failed to fetch subscription: %s", resp.text)
-            return None
+    client = get_http_client()
+    resp = await client.get(url, headers=_supabase_headers(), params=params)
+    if resp.status_code != 200:
+        logger.error("Failed to fetch subscription: %s", resp.text)
+        return None
 
-        rows = resp.json()
-        if not rows:
-            return {"tier": "basic", "status": "active", "token_limit": 0, "tokens_used": 0, "topup_tokens": 0}
+    rows = resp.json()
+    if not rows:
+        return {"tier": "basic", "status": "active", "token_limit": 0, "tokens_used": 0, "topup_tokens": 0}
 
-        sub = rows[0]
+    sub = rows[0]
 
-        # Fetch current token usage
-        usage = await _get_token_usage(client, user_id, sub.get("period_start"))
-        sub["tokens_used"] = usage.get("tokens_used", 0)
-        sub["topup_tokens"] = usage.get("topup_tokens", 0)
+    # Fetch current token usage
+    usage = await _get_token_usage(client, user_id, sub.get("period_start"))
+    sub["tokens_used"] = usage.get("tokens_used", 0)
+    sub["topup_tokens"] = usage.get("topup_tokens", 0)
 
-        return sub
+    return sub
 
 
 async def _get_token_usage(client: httpx.AsyncClient, user_id: str, period_start: str | None) -> dict:
@@ -66,7 +106,7 @@ async def _get_token_usage(client: httpx.AsyncClient, user_id: str, period_start
         "select": "tokens_used,topup_tokens",
     }
 
-    resp = await client.get(url, headers=_supabase_headers(), params=params, timeout=10)
+    resp = await client.get(url, headers=_supabase_headers(), params=params)
     if resp.status_code != 200 or not resp.json():
         return {"tokens_used": 0, "topup_tokens": 0}
 
@@ -94,11 +134,39 @@ def check_token_limit(sub: dict) -> bool:
     return sub.get("tokens_used", 0) < total_available
 
 
-async def record_token_usage(user_id: str, tokens: int, model: str) -> int | None:
-    """Record token usage via Supabase RPC. Returns new total."""
-    if not settings.supabase_url or not settings.supabase_service_key:
-        return None
+def add_pending_usage(user_id: str, tokens: int) -> None:
+    """Count tokens in the user's cached usage before Supabase has recorded them."""
+    _pending_tokens[user_id] = _pending_tokens.get(user_id, 0) + tokens
+
 
+def settle_pending_usage(user_id: str, tokens: int, new_total: int | None) -> None:
+    """Move pending tokens into the cached subscription once their RPC has returned."""
+    remaining = _pending_tokens.pop(user_id, 0) - tokens
+    if remaining > 0:
+        _pending_tokens[user_id] = remaining
+
+    sub = memory_cache.get("subscription", user_id)
+    if sub is None:
+        return
+    if isinstance(new_total, int):
+        tokens_used = max(new_total, sub.get("tokens_used", 0))
+    else:
+        # Not recorded upstream; keep counting it locally until the entry expires
+        tokens_used = sub.get("tokens_used", 0) + tokens
+    memory_cache.set("subscription", user_id, {**sub, "tokens_used": tokens_used})
+
+
+async def increment_token_usage(
+    user_id: str, tokens: int, model: str
+) -> tuple[bool, int | None]:
+    """Call the increment_token_usage RPC; returns (recorded, new period total).
+
+    recorded is False only if the RPC itself rejects the increment (e.g. no
+    active subscription). The total is None when the response did not carry one.
+    Raises on everything else so the usage stays spooled: server errors,
+    timeouts and rate limits, network failures, and auth or routing errors
+    (401/403/404), which mean the backend is misconfigured.
+    """
     url = f"{settings.supabase_url}/rest/v1/rpc/increment_token_usage"
     payload = {
         "p_user_id": user_id,
@@ -106,12 +174,19 @@ async def record_token_usage(user_id: str, tokens: int, model: str) -> int | Non
         "p_model": model,
     }
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            url, headers=_supabase_headers(), json=payload, timeout=10
+    resp = await get_http_client().post(url, headers=_supabase_headers(), json=payload)
+    if resp.status_code == 200:
+        new_total = resp.json()
+        return True, new_total if isinstance(new_total, int) else None
+    if resp.status_code in _USAGE_REJECTED_STATUSES:
+        logger.error("Supabase rejected token usage for %s: %s", user_id, resp.text)
+        return False, None
+    if resp.status_code in (401, 403, 404):
+        logger.error(
+            "Token usage kept in the spool: Supabase answered %d; check SUPABASE_URL and "
+            "SUPABASE_SERVICE_KEY: %s",
+            resp.status_code,
+            resp.text,
         )
-        if resp.status_code != 200:
-            logger.error("Failed to record token usage: %s", resp.text)
-            return None
-
-        return resp.json()
+    resp.raise_for_status()
+    return True, None  # Another 2xx: recorded, but without the new total
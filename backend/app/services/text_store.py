@@ -0,0 +1,207 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from app.config import settings
+from app.utils.file_identity import FileIdentity
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored layout or extraction options change
+STORE_VERSION = 1
+
+# The latest stored version of each path is recorded under cache_dir/versions;
+# saving a newer version deletes the older one's text, pages and objects. The
+# render cache is left alone: it evicts by its own byte budget.
+_VERSIONS_DIR = "versions"
+_SELF_MANAGED_DIRS = {_VERSIONS_DIR, "renders"}
+_MAX_KNOWN_VERSIONS = 4096
+
+# path → key already recorded, so saving page after page only checks memory
+_known_versions: OrderedDict[str, str] = OrderedDict()
+_known_versions_lock = threading.Lock()
+
+
+def _entry_path(identity: FileIdentity) -> Path:
+    key = identity.key
+    return settings.get_cache_dir() / "text" / key[:2] / f"{key}.json"
+
+
+def load_pages(identity: FileIdentity) -> list[dict] | None:
+    """Return the stored pages for this file version, or None on a miss."""
+    if not settings.text_store_enabled:
+        return None
+
+    path = _entry_path(identity)
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning("Discarding unreadable text store entry %s", path)
+        return None
+
+    if entry.get("version") != STORE_VERSION:
+        return None
+    return entry["pages"]
+
+
+def save_pages(identity: FileIdentity, pages: list[dict]) -> None:
+    """Persist extracted pages. Failures are logged, never raised."""
+    if not settings.text_store_enabled:
+        return
+
+    _track_version(identity)
+    path = _entry_path(identity)
+    entry = {
+        "version": STORE_VERSION,
+        "path": identity.path,
+        "size": identity.size,
+        "mtime_ns": identity.mtime_ns,
+        "pages": pages,
+    }
+    try:
+        write_atomic(path, json.dumps(entry, ensure_ascii=False))
+    except OSError:
+        logger.exception("Failed to write text store entry %s", path)
+
+
+def _page_path(identity: FileIdentity, page_num: int) -> Path:
+    key = identity.key
+    return settings.get_cache_dir() / "pages" / key[:2] / key / f"{STORE_VERSION}-{page_num}.txt"
+
+
+def load_page(identity: FileIdentity, page_num: int) -> str | None:
+    """Return the stored text of a single page, or None on a miss."""
+    if not settings.text_store_enabled:
+        return None
+    try:
+        with open(_page_path(identity, page_num), encoding="utf-8", newline="") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning("Discarding unreadable page entry %s", _page_path(identity, page_num))
+        return None
+
+
+def save_page(identity: FileIdentity, page_num: int, text: str) -> None:
+    if not settings.text_store_enabled:
+        return
+    _track_version(identity)
+    path = _page_path(identity, page_num)
+    try:
+        write_atomic(path, text)
+    except OSError:
+        logger.exception("Failed to write page entry %s", path)
+
+
+def _object_path(kind: str, identity: FileIdentity) -> Path:
+    key = identity.key
+    return settings.get_cache_dir() / kind / key[:2] / f"{key}.pkl"
+
+
+def load_object(kind: str, identity: FileIdentity):
+    """Return a pickled artifact (e.g. a retrieval index) for this file version, or None."""
+    if not settings.text_store_enabled:
+        return None
+
+    path = _object_path(kind, identity)
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Corrupt file or written by an incompatible library version
+        logger.warning("Discarding unreadable %s entry %s", kind, path)
+        return None
+
+
+def save_object(kind: str, identity: FileIdentity, obj) -> None:
+    if not settings.text_store_enabled:
+        return
+
+    _track_version(identity)
+    path = _object_path(kind, identity)
+    try:
+        write_atomic(path, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+    except OSError:
+        logger.exception("Failed to write %s entry %s", kind, path)
+
+
+def _track_version(identity: FileIdentity) -> None:
+    """Record identity as the path's latest version, removing the previous one's artifacts."""
+    with _known_versions_lock:
+        if _known_versions.get(identity.path) == identity.key:
+            _known_versions.move_to_end(identity.path)
+            return
+
+    digest = hashlib.sha256(identity.path.encode("utf-8")).hexdigest()
+    pointer = settings.get_cache_dir() / _VERSIONS_DIR / digest[:2] / f"{digest}.txt"
+    previous_key, previous_mtime_ns = "", -1
+    try:
+        previous_key, mtime_ns = pointer.read_text(encoding="utf-8").split()
+        previous_mtime_ns = int(mtime_ns)
+    except (OSError, ValueError):
+        pass
+
+    if previous_key != identity.key:
+        if identity.mtime_ns < previous_mtime_ns:
+            return  # A job that started before the file changed; never undo the newer version
+        try:
+            write_atomic(pointer, f"{identity.key} {identity.mtime_ns}")
+        except OSError:
+            logger.exception("Failed to record text store version %s", pointer)
+            return
+        if previous_key:
+            _remove_version(previous_key)
+
+    with _known_versions_lock:
+        _known_versions[identity.path] = identity.key
+        _known_versions.move_to_end(identity.path)
+        while len(_known_versions) > _MAX_KNOWN_VERSIONS:
+            _known_versions.popitem(last=False)
+
+
+def _remove_version(key: str) -> None:
+    # Every artifact kind lives at <kind>/<key[:2]>/<key>.<ext>, or in a
+    # <kind>/<key[:2]>/<key>/ directory for per-page entries
+    try:
+        kinds = [d for d in settings.get_cache_dir().iterdir() if d.is_dir()]
+    except OSError:
+        return
+    for kind_dir in kinds:
+        if kind_dir.name in _SELF_MANAGED_DIRS:
+            continue
+        shard = kind_dir / key[:2]
+        for path in shard.glob(f"{key}.*"):
+            path.unlink(missing_ok=True)
+        if (shard / key).is_dir():
+            shutil.rmtree(shard / key, ignore_errors=True)
+
+
+def write_atomic(path: Path, data: str | bytes) -> None:
+    # Write to a temp file in the same directory, then rename, so readers
+    # (possibly in another worker process) never see a partial entry.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        if isinstance(data, bytes):
+            f = os.fdopen(fd, "wb")
+        else:
+            f = os.fdopen(fd, "w", encoding="utf-8", newline="")
+        with f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from sqlalchemy import delete, select, update
+
+from app.config import settings
+from app.database import async_session
+from app.models.usage import UsageEvent
+from app.services.subscription_service import (
+    add_pending_usage,
+    increment_token_usage,
+    settle_pending_usage,
+)
+from app.utils.cache import memory_cache
+
+logger = logging.getLogger(__name__)
+
+# Spooled events sent per flush
+_FLUSH_BATCH = 5000
+_MAX_BACKOFF = 300.0
+
+
+@dataclass
+class _Usage:
+    user_id: str
+    model: str
+    tokens: int
+    period_start: str | None
+
+
+_queue: list[_Usage] = []
+_wakeup: asyncio.Event | None = None
+_task: asyncio.Task | None = None
+_stats = {
+    "queued": 0,
+    "spooled": 0,
+    "flushed_events": 0,
+    "flushed_batches": 0,
+    "rejected_events": 0,
+    "failed_flushes": 0,
+    "last_flush": None,
+    "last_error": "",
+}
+
+
+def record_usage(user_id: str, tokens: int, model: str) -> None:
+    """Queue a usage event; returns immediately. The flusher spools and sends it.
+
+    The tokens count against the user's cached subscription right away, so
+    limits are enforced before Supabase has been told.
+    """
+    if not settings.supabase_url or not settings.supabase_service_key:
+        return
+    sub = memory_cache.get("subscription", user_id)
+    _queue.append(_Usage(user_id, model, tokens, sub.get("period_start") if sub else None))
+    _stats["queued"] += 1
+    add_pending_usage(user_id, tokens)
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def start_usage_flusher() -> None:
+    global _task, _wakeup
+    if _task is None:
+        _wakeup = asyncio.Event()
+        _task = asyncio.create_task(_run())
+
+
+async def stop_usage_flusher() -> None:
+    """Spool what is still in memory and make a last attempt to send it."""
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    await asyncio.gather(_task, return_exceptions=True)
+    _task = None
+    await _spool_queued()
+    try:
+        await asyncio.wait_for(flush_usage(), timeout=5)
+    except Exception as e:
+        logger.warning("Usage left in the spool for the next start: %s", e)
+
+
+def get_usage_stats() -> dict:
+    return {**_stats, "in_memory": len(_queue)}
+
+
+async def flush_usage() -> int:
+    """Send spooled usage as one increment per user, model and period.
+
+    Rows are deleted only after their increment succeeds, so a failed or
+    interrupted flush is retried. Returns the number of events sent.
+    """
+    async with async_session() as db:
+        events = (
+            await db.execute(select(UsageEvent).order_by(UsageEvent.id).limit(_FLUSH_BATCH))
+        ).scalars().all()
+    if not events:
+        return 0
+
+    groups: dict[tuple, list[UsageEvent]] = defaultdict(list)
+    for event in events:
+        groups[(event.user_id, event.model, event.period_start)].append(event)
+
+    async def send(key: tuple, group: list[UsageEvent]) -> tuple[list[int], Exception | None]:
+        user_id, model, _ = key
+        tokens = sum(e.tokens for e in group)
+        try:
+            # The RPC charges the user's active period; period_start only keeps
+            # events from different periods out of one increment
+            recorded, new_total = await increment_token_usage(user_id, tokens, model)
+        except Exception as e:
+            return [], e
+        if not recorded:
+            _stats["rejected_events"] += len(group)
+        settle_pending_usage(user_id, tokens, new_total)
+        return [e.id for e in group], None
+
+    results = await asyncio.gather(*(send(k, g) for k, g in groups.items()))
+    done = [i for ids, _ in results for i in ids]
+    errors = [e for _, e in results if e is not None]
+
+    async with async_session() as db:
+        if done:
+            await db.execute(delete(UsageEvent).where(UsageEvent.id.in_(done)))
+        if errors:
+            sent = set(done)
+            failed = [e.id for e in events if e.id not in sent]
+            await db.execute(
+                update(UsageEvent)
+                .where(UsageEvent.id.in_(failed))
+                .values(attempts=UsageEvent.attempts + 1)
+            )
+        await db.commit()
+
+    _stats["flushed_events"] += len(done)
+    if errors:
+        raise errors[0]
+    _stats["flushed_batches"] += 1
+    _stats["last_flush"] = time.time()
+    return len(done)
+
+
+async def _spool_queued() -> None:
+    if not _queue:
+        return
+    batch = _queue[:]
+    del _queue[: len(batch)]
+    try:
+        async with async_session() as db:
+            db.add_all(
+                UsageEvent(
+                    user_id=u.user_id, model=u.model, tokens=u.tokens, period_start=u.period_start
+                )
+                for u in batch
+            )
+            await db.commit()
+    except Exception:
+        _queue[:0] = batch
+        raise
+    _stats["spooled"] += len(batch)
+
+
+async def _replay_spool() -> None:
+    # Usage spooled before a restart still counts against the users' limits
+    async with async_session() as db:
+        events = (await db.execute(select(UsageEvent.user_id, UsageEvent.tokens))).all()
+    for user_id, tokens in events:
+        add_pending_usage(user_id, tokens)
+    if events:
+        logger.info("Replaying %d spooled usage events", len(events))
+
+
+async def _run() -> None:
+    try:
+        await _replay_spool()
+    except Exception:
+        logger.exception("Failed to read the usage spool")
+
+    backoff = 0.0
+    next_flush = time.monotonic()  # Replayed events go out right away
+    while True:
+        timeout = max(0.0, next_flush - time.monotonic())
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout)
+        except TimeoutError:
+            pass
+        _wakeup.clear()
+
+        try:
+            await _spool_queued()
+        except Exception:
+            logger.exception("Failed to spool usage events")
+
+        if time.monotonic() < next_flush:
+            continue
+        try:
+            while await flush_usage() == _FLUSH_BATCH:
+                pass
+            backoff = 0.0
+        except Exception as e:
+            _stats["failed_flushes"] += 1
+            _stats["last_error"] = str(e)
+            backoff = min(max(backoff * 2, settings.usage_flush_interval), _MAX_BACKOFF)
+            logger.warning("Usage flush failed, retrying in %.0fs: %s", backoff, e)
+        next_flush = time.monotonic() + max(backoff, settings.usage_flush_interval)
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_executor: Executor | None = None
+_shard_executor: ProcessPoolExecutor | None = None
+_render_executor: ProcessPoolExecutor | None = None
+
+
+def get_worker_count() -> int:
+    if settings.pdf_workers > 0:
+        return settings.pdf_workers
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def get_executor() -> Executor:
+    """Return the shared PDF executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        workers = get_worker_count()
+        if settings.pdf_executor == "process":
+            # spawn everywhere: fork is unsafe once the event loop and threads are running
+            _executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-worker")
+        logger.info("Started %s PDF pool with %d workers", settings.pdf_executor, workers)
+    return _executor
+
+
+def get_shard_worker_count() -> int:
+    if settings.parallel_extract_workers > 0:
+        return settings.parallel_extract_workers
+    return os.cpu_count() or 1
+
+
+def get_shard_executor() -> ProcessPoolExecutor:
+    """Return the process pool used to extract page shards of large PDFs in parallel."""
+    global _shard_executor
+    if _shard_executor is None:
+        _shard_executor = ProcessPoolExecutor(
+            max_workers=get_shard_worker_count(), mp_context=multiprocessing.get_context("spawn")
+        )
+    return _shard_executor
+
+
+def get_render_executor() -> ProcessPoolExecutor:
+    """Return the process pool that rasterizes pages (CPU-bound, holds the GIL)."""
+    global _render_executor
+    if _render_executor is None:
+        workers = settings.render_workers or get_worker_count()
+        _render_executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info("Started render pool with %d workers", workers)
+    return _render_executor
+
+
+async def run_pdf_job(
+    fn: Callable[..., Any],
+    *args: Any,
+    timeout: float | None = None,
+    executor: Executor | None = None,
+) -> Any:
+    """Run a blocking PDF function in the worker pool without blocking the event loop.
+
+    Raises TimeoutError after `timeout` (default: settings.pdf_job_timeout). On timeout
+    or cancellation a queued job is dropped; a job that already started runs to
+    completion in its worker, but its result is discarded. Pass `executor` to use a
+    pool other than the shared PDF pool.
+    """
+    if timeout is None:
+        timeout = settings.pdf_job_timeout or None
+
+    future = (executor or get_executor()).submit(fn, *args)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except (TimeoutError, asyncio.CancelledError):
+        future.cancel()
+        raise
+
+
+def shutdown_executor() -> None:
+    global _executor, _shard_executor, _render_executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _shard_executor is not None:
+        _shard_executor.shutdown(wait=False, cancel_futures=True)
+        _shard_executor = None
+    if _render_executor is not None:
+        _render_executor.shutdown(wait=False, cancel_futures=True)
+        _render_executor = None
@@ -1,12 +1,19 @@
+import hashlib
 import logging
+import time
 
 import jwt
 from fastapi import Depends, HTTPException, Request
 
 from app.config import settings
+from app.utils.cache import memory_cache
 
 logger = logging.getLogger(__name__)
 
+# Verified tokens: digest -> (user_id, exp), or None for a token that failed
+# verification. Entries expire with the token, so a hit never outlives it.
+memory_cache.register("jwt", weigher=lambda _: 256)
+
 
 def _get_token(request: Request) -> str | None:
     """Extract Bearer token from Authorization header."""
@@ -26,6 +33,33 @@ async def get_optional_user_id(request: Request) -> str | None:
         logger.warning("supabase_jwt_secret not configured, skipping auth")
         return None
 
+    if not settings.jwt_cache_enabled:
+        return _verify(token)[0]
+
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached = memory_cache.get("jwt", key, default=False)
+    if cached is None:
+        return None
+    if cached is not False:
+        user_id, exp = cached
+        if exp is None or exp > time.time():
+            return user_id
+
+    user_id, exp = _verify(token)
+    if user_id is None or exp is None:
+        # Briefly remember failures (and tokens without an expiry) so a bad
+        # token cannot force repeated verification
+        if settings.jwt_negative_cache_ttl > 0:
+            memory_cache.set(
+                "jwt", key, (user_id, exp) if user_id else None, ttl=settings.jwt_negative_cache_ttl
+            )
+    elif exp > time.time():
+        memory_cache.set("jwt", key, (user_id, exp), ttl=exp - time.time())
+    return user_id
+
+
+def _verify(token: str) -> tuple[str | None, float | None]:
+    """Full signature and claims check; returns (user_id, exp) or (None, None)."""
     try:
         payload = jwt.decode(
             token,
@@ -33,10 +67,11 @@ async def get_optional_user_id(request: Request) -> str | None:
             algorithms=["HS256"],
             audience="authenticated",
         )
-        return payload.get("sub")
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError) as e:
         logger.debug("JWT validation failed: %s", e)
-        return None
+        return None, None
+    user_id = payload.get("sub")
+    return (user_id, payload.get("exp")) if user_id else (None, None)
 
 
 async def get_required_user_id(request: Request) -> str:
@@ -0,0 +1,149 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from app.config import settings
+
+Weigher = Callable[[Any], int]
+
+
+@dataclass
+class _Entry:
+    value: Any
+    weight: int
+    expires_at: float | None
+
+
+@dataclass
+class _Namespace:
+    weigher: Weigher
+    ttl: float | None
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+class ByteLRUCache:
+    """Thread-safe in-memory LRU cache bounded by an estimated byte budget.
+
+    Values live in namespaces ("paper_text", "token_count", ...). Each namespace
+    has its own weigher, which estimates the memory cost of a value, and may
+    override the cache-wide TTL. All namespaces share one budget and one LRU order.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float | None = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, Hashable], _Entry] = OrderedDict()
+        self._namespaces: dict[str, _Namespace] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def register(
+        self, namespace: str, weigher: Weigher = sys.getsizeof, ttl: float | None = None
+    ) -> None:
+        with self._lock:
+            if namespace not in self._namespaces:
+                self._namespaces[namespace] = _Namespace(
+                    weigher=weigher, ttl=ttl if ttl is not None else self.ttl
+                )
+
+    def get(self, namespace: str, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            ns = self._namespaces[namespace]
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                ns.misses += 1
+                return default
+            if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._remove((namespace, key), entry)
+                ns.expirations += 1
+                ns.misses += 1
+                return default
+            self._entries.move_to_end((namespace, key))
+            ns.hits += 1
+            return entry.value
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """Store a value; ttl (seconds) overrides the namespace TTL for this entry."""
+        with self._lock:
+            ns = self._namespaces[namespace]
+            weight = max(int(ns.weigher(value)), 1)
+            old = self._entries.get((namespace, key))
+            if old is not None:
+                self._remove((namespace, key), old)
+            if weight > self.max_bytes:
+                return  # Never worth evicting everything else for one value
+
+            ttl = ttl if ttl is not None else ns.ttl
+            expires_at = time.monotonic() + ttl if ttl else None
+            self._entries[(namespace, key)] = _Entry(value, weight, expires_at)
+            ns.entries += 1
+            ns.bytes += weight
+            self._total_bytes += weight
+            self._evict_to_budget()
+
+    def invalidate(self, namespace: str, key: Hashable | None = None) -> None:
+        """Drop one key, or the whole namespace when key is None."""
+        with self._lock:
+            if key is not None:
+                entry = self._entries.get((namespace, key))
+                if entry is not None:
+                    self._remove((namespace, key), entry)
+                return
+            for cache_key in [k for k in self._entries if k[0] == namespace]:
+                self._remove(cache_key, self._entries[cache_key])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            for ns in self._namespaces.values():
+                ns.entries = 0
+                ns.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_bytes": self.max_bytes,
+                "total_bytes": self._total_bytes,
+                "entries": len(self._entries),
+                "namespaces": {
+                    name: {
+                        "hits": ns.hits,
+                        "misses": ns.misses,
+                        "evictions": ns.evictions,
+                        "expirations": ns.expirations,
+                        "entries": ns.entries,
+                        "bytes": ns.bytes,
+                        "ttl": ns.ttl,
+                    }
+                    for name, ns in self._namespaces.items()
+                },
+            }
+
+    def _remove(self, cache_key: tuple[str, Hashable], entry: _Entry) -> None:
+        del self._entries[cache_key]
+        ns = self._namespaces[cache_key[0]]
+        ns.entries -= 1
+        ns.bytes -= entry.weight
+        self._total_bytes -= entry.weight
+
+    def _evict_to_budget(self) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            cache_key, entry = next(iter(self._entries.items()))
+            self._remove(cache_key, entry)
+            self._namespaces[cache_key[0]].evictions += 1
+
+
+memory_cache = ByteLRUCache(
+    max_bytes=settings.memory_cache_max_bytes,
+    ttl=settings.memory_cache_ttl or None,
+)
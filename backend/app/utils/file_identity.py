@@ -0,0 +1,77 @@
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+_MAX_CONTENT_HASHES = 4096
+
+# path → (size, mtime_ns, content hash) of its latest version, so a file is only
+# hashed once per change; least recently used paths are dropped past the limit
+_content_hashes: OrderedDict[str, tuple[int, int, str]] = OrderedDict()
+_content_hashes_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class FileIdentity:
+    """Identifies one version of a file on disk."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str = ""
+
+    @property
+    def key(self) -> str:
+        """Stable digest used to address cached artifacts for this file version."""
+        if self.content_hash:
+            return self.content_hash
+        raw = f"{self.path}\0{self.size}\0{self.mtime_ns}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get_file_identity(file_path: str | Path, hash_content: bool = False) -> FileIdentity:
+    """Stat a file and return its identity. Raises FileNotFoundError if missing."""
+    path = Path(file_path).resolve()
+    stat = path.stat()
+    content_hash = ""
+    if hash_content:
+        content_hash = _hash_file(str(path), stat.st_size, stat.st_mtime_ns)
+    return FileIdentity(
+        path=str(path),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        content_hash=content_hash,
+    )
+
+
+async def get_file_identity_async(
+    file_path: str | Path, hash_content: bool = False
+) -> FileIdentity:
+    """get_file_identity for the event loop: hashing a file's content runs in a thread."""
+    if hash_content:
+        return await asyncio.to_thread(get_file_identity, file_path, True)
+    return get_file_identity(file_path)
+
+
+def _hash_file(path: str, size: int, mtime_ns: int) -> str:
+    with _content_hashes_lock:
+        cached = _content_hashes.get(path)
+        if cached is not None and cached[:2] == (size, mtime_ns):
+            _content_hashes.move_to_end(path)
+            return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+    content_hash = digest.hexdigest()
+
+    with _content_hashes_lock:
+        _content_hashes[path] = (size, mtime_ns, content_hash)
+        _content_hashes.move_to_end(path)
+        while len(_content_hashes) > _MAX_CONTENT_HASHES:
+            _content_hashes.popitem(last=False)
+    return content_hash
@@ -0,0 +1,106 @@
+import importlib.util
+import logging
+import time
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: httpx.AsyncClient | None = None
+_stats = {"requests": 0, "errors": 0, "in_flight": 0, "total_seconds": 0.0}
+_status_counts: dict[str, int] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The shared connection-pooled client for all outbound HTTP calls.
+
+    Created by the app lifespan; callers outside the app (scripts, the CLI)
+    get one created on first use. Never close it yourself.
+    """
+    global _client
+    if _client is None:
+        _client = _create_client()
+    return _client
+
+
+async def start_http_client() -> None:
+    get_http_client()
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def http_client_stats() -> dict:
+    transport = _client._transport if _client is not None else None
+    stats = {
+        **_stats,
+        "status": dict(_status_counts),
+        "http2": isinstance(transport, _MeteredTransport) and transport.http2,
+        "max_connections": settings.http_max_connections,
+        "max_keepalive_connections": settings.http_max_keepalive_connections,
+    }
+    if isinstance(transport, _MeteredTransport):
+        stats.update(transport.pool_stats())
+    return stats
+
+
+class _MeteredTransport(httpx.AsyncBaseTransport):
+    """Counts requests, failures and latency (to response headers) around the pool."""
+
+    def __init__(self, http2: bool, limits: httpx.Limits):
+        self.http2 = http2
+        self._transport = httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        _stats["requests"] += 1
+        _stats["in_flight"] += 1
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except Exception:
+            _stats["errors"] += 1
+            raise
+        finally:
+            _stats["in_flight"] -= 1
+            _stats["total_seconds"] += time.perf_counter() - started
+        status_class = f"{response.status_code // 100}xx"
+        _status_counts[status_class] = _status_counts.get(status_class, 0) + 1
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def pool_stats(self) -> dict:
+        # httpx has no public pool API; read httpcore's pool when it is there
+        connections = list(getattr(getattr(self._transport, "_pool", None), "connections", []))
+        return {
+            "connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+        }
+
+
+def _http2_enabled() -> bool:
+    # httpx only speaks HTTP/2 with the optional h2 package installed
+    return settings.http2 and importlib.util.find_spec("h2") is not None
+
+
+def _create_client() -> httpx.AsyncClient:
+    http2 = _http2_enabled()
+    if settings.http2 and not http2:
+        logger.info("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    return httpx.AsyncClient(
+        transport=_MeteredTransport(http2, limits),
+        timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+    )
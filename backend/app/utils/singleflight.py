@@ -0,0 +1,55 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _OpStats:
+    calls: int = 0
+    executions: int = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same (operation, key) into one computation.
+
+    The first caller starts the work as its own task; callers arriving while it
+    is in flight await that task instead of repeating it. The task is shielded,
+    so a caller that disconnects does not cancel the work for everyone else.
+    """
+
+    def __init__(self):
+        self._tasks: dict[tuple[str, Hashable], asyncio.Task] = {}
+        self._stats: dict[str, _OpStats] = {}
+
+    async def do(self, op: str, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        stats = self._stats.setdefault(op, _OpStats())
+        stats.calls += 1
+
+        flight_key = (op, key)
+        task = self._tasks.get(flight_key)
+        if task is None:
+            stats.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[flight_key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(flight_key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        in_flight: dict[str, int] = {}
+        for op, _ in self._tasks:
+            in_flight[op] = in_flight.get(op, 0) + 1
+        return {
+            op: {
+                "calls": s.calls,
+                "executions": s.executions,
+                "coalesced": s.calls - s.executions,
+                "in_flight": in_flight.get(op, 0),
+            }
+            for op, s in self._stats.items()
+        }
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,18 @@
+import functools
+
+import tiktoken
+
+
+@functools.cache
+def get_encoder() -> tiktoken.Encoding:
+    """Load the tokenizer once per process; encoding_for_model re-reads the BPE ranks."""
+    return tiktoken.encoding_for_model("gpt-4o")
+
+
+def count_tokens(text: str) -> int:
+    # encode_ordinary: paper text is never meant to contain special tokens
+    return len(get_encoder().encode_ordinary(text))
+
+
+def count_tokens_batch(texts: list[str]) -> list[int]:
+    return [len(tokens) for tokens in get_encoder().encode_ordinary_batch(texts)]
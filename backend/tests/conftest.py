@@ -0,0 +1,9 @@
+import pytest
+
+from app.config import settings
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(tmp_path, monkeypatch):
+    # Extraction writes to the text store; keep it out of the real data directory
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
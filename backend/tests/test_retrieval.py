@@ -0,0 +1,138 @@
+import random
+
+import pymupdf
+import pytest
+
+from app.services.chunk_service import chunk_pages
+from app.services.pdf_service import extract_text
+from app.services.retrieval_service import (
+    BM25Index,
+    TfidfIndex,
+    build_index,
+    retrieve_relevant_chunks,
+)
+
+TOPICS = 16
+PAGES_PER_TOPIC = 3
+WORDS_PER_PAGE = 220
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice("bcdfghjklmnpqrstvwz") + rng.choice("aeiou") for _ in range(3))
+
+
+@pytest.fixture(scope="module")
+def topical_pdf(tmp_path_factory):
+    """A paper whose pages each discuss one of TOPICS topics, spread through the document.
+
+    Every page mixes a shared filler vocabulary with its topic's own terms, so
+    a query made of topic terms has a clear set of relevant pages.
+    """
+    rng = random.Random(7)
+    filler = [_word(rng) for _ in range(400)]
+    topics = [[_word(rng) for _ in range(12)] for _ in range(TOPICS)]
+
+    path = tmp_path_factory.mktemp("pdfs") / "topical.pdf"
+    doc = pymupdf.open()
+    page_topics = []
+    for page_num in range(TOPICS * PAGES_PER_TOPIC):
+        topic = (page_num * 5) % TOPICS  # Pages of one topic are never adjacent
+        words = [
+            rng.choice(topics[topic]) if rng.random() < 0.3 else rng.choice(filler)
+            for _ in range(WORDS_PER_PAGE)
+        ]
+        page = doc.new_page()
+        box = page.rect + (36, 36, -36, -36)
+        assert page.insert_textbox(box, " ".join(words), fontsize=7) >= 0
+        page_topics.append(topic)
+    doc.save(path)
+    doc.close()
+    return str(path), topics, page_topics
+
+
+def _tfidf_reference_pages(pages: list[dict], query: str, top_k: int) -> set[int]:
+    """Pages covered by the top_k chunks of the original TF-IDF retrieval.
+
+    Same algorithm as the implementation it replaced: fixed 1000-word chunks and
+    a vectorizer fitted on the chunks plus the query for every request.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    words = [(w, p["page_num"]) for p in pages for w in p["text"].split()]
+    chunks = [words[i : i + 1000] for i in range(0, len(words), 1000)]
+    matrix = TfidfVectorizer(stop_words="english").fit_transform(
+        [" ".join(w for w, _ in c) for c in chunks] + [query]
+    )
+    similarities = cosine_similarity(matrix[-1], matrix[:-1]).flatten()
+    return {page for i in similarities.argsort()[-top_k:] for _, page in chunks[i]}
+
+
+def test_bm25_top_k_matches_tfidf_reference(topical_pdf):
+    path, topics, page_topics = topical_pdf
+    pages = extract_text(path)
+    index = build_index(pages, engine="bm25")
+    rng = random.Random(11)
+
+    overlaps = []
+    for topic, terms in enumerate(topics):
+        query = " ".join(rng.sample(terms, 3))
+        relevant = {p for p, t in enumerate(page_topics) if t == topic}
+        reference = _tfidf_reference_pages(pages, query, top_k=PAGES_PER_TOPIC)
+
+        ranked = index.search(query, PAGES_PER_TOPIC)
+        found = {
+            page
+            for i in ranked
+            for page in range(index.chunks[i].page_start, index.chunks[i].page_end + 1)
+        }
+        # BM25's chunks are about a page long, so their pages should be ones the
+        # reference (with its much coarser chunks) also returned
+        overlaps.append(len(found & reference) / len(found))
+        assert found & relevant
+
+    # A random ranking scores about 0.35 here
+    assert sum(overlaps) / len(overlaps) >= 0.85
+
+
+@pytest.mark.parametrize("index_cls", [TfidfIndex, BM25Index])
+def test_empty_vocabulary(index_cls):
+    index = index_cls(chunk_pages([{"page_num": 0, "text": "the and of to\nit is"}]))
+
+    assert index.search("anything", 5) == []
+    # No ranking: the budget is filled in document order
+    assert retrieve_relevant_chunks(index, "anything", 1000) == retrieve_relevant_chunks(
+        index, "", 1000
+    )
+
+
+@pytest.mark.parametrize("index_cls", [TfidfIndex, BM25Index])
+def test_no_chunks(index_cls):
+    index = index_cls([])
+
+    assert index.search("anything", 5) == []
+    assert retrieve_relevant_chunks(index, "anything", 1000) == ""
+
+
+@pytest.mark.parametrize("engine", ["tfidf", "bm25"])
+def test_no_matching_terms(topical_pdf, engine):
+    index = build_index(extract_text(topical_pdf[0]), engine=engine)
+
+    assert index.search("zzzqqq xxyyz", 5) == []
+    assert retrieve_relevant_chunks(index, "zzzqqq xxyyz", 2000) == retrieve_relevant_chunks(
+        index, "", 2000
+    )
+
+
+@pytest.mark.parametrize("engine", ["tfidf", "bm25"])
+def test_retrieval_respects_budget(topical_pdf, engine):
+    path, topics, _ = topical_pdf
+    index = build_index(extract_text(path), engine=engine)
+    query = " ".join(topics[0][:3])
+
+    budget = 3 * max(c.token_count for c in index.chunks)
+    context = retrieve_relevant_chunks(index, query, budget)
+    selected = [c for c in index.chunks if c.text in context]
+
+    assert selected
+    assert sum(c.token_count for c in selected) <= budget
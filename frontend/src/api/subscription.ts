@@ -16,6 +16,11 @@ export function getSubscriptionStatus(): Promise<SubscriptionStatus> {
   return apiFetch('/subscription/status');
 }
 
+// Bypasses the backend's subscription cache (e.g. right after a payment)
+export function refreshSubscriptionStatus(): Promise<SubscriptionStatus> {
+  return apiFetch('/subscription/refresh', { method: 'POST' });
+}
+
 async function callEdgeFunction(fnName: string, body: Record<string, unknown>): Promise<any> {
   // Try auth store session first (already loaded from secure storage),
   // then fall back to getSession()
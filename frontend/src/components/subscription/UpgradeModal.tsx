@@ -138,7 +138,7 @@ export function UpgradeModal() {
         if (response.success) {
           setIsOpen(false);
           // Refresh subscription status after successful payment
-          useSubscriptionStore.getState().fetchSubscription();
+          useSubscriptionStore.getState().fetchSubscription(true);
         } else {
           setError(response.error_msg || 'Payment failed');
         }
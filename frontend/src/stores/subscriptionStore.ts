@@ -1,5 +1,5 @@
 import { create } from 'zustand';
-import { getSubscriptionStatus } from '../api/subscription';
+import { getSubscriptionStatus, refreshSubscriptionStatus } from '../api/subscription';
 
 interface SubscriptionState {
   tier: 'basic' | 'pro' | 'max';
@@ -10,7 +10,7 @@ interface SubscriptionState {
   periodEnd: string | null;
   isLoading: boolean;
   usagePercent: number;
-  fetchSubscription: () => Promise<void>;
+  fetchSubscription: (refresh?: boolean) => Promise<void>;
   clearSubscription: () => void;
 }
 
@@ -30,10 +30,10 @@ export const useSubscriptionStore = create<SubscriptionState>((set) => ({
   isLoading: false,
   usagePercent: 0,
 
-  fetchSubscription: async () => {
+  fetchSubscription: async (refresh = false) => {
     set({ isLoading: true });
     try {
-      const data = await getSubscriptionStatus();
+      const data = await (refresh ? refreshSubscriptionStatus() : getSubscriptionStatus());
       set({
         tier: data.tier,
         status: data.status,
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark the auth dependency with and without the verified-JWT cache.
+
+Usage (from the repo root):
+    python scripts/bench-auth.py [--requests 20000] [--concurrency 64] [--users 50]
+
+Each request resolves get_optional_user_id for one of --users signed tokens;
+--invalid is the fraction of requests carrying a token with a bad signature.
+Reports throughput and per-call latency percentiles for both modes.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(SCRIPT_DIR), "backend"))
+
+import jwt  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.utils.auth import get_optional_user_id  # noqa: E402
+from app.utils.cache import memory_cache  # noqa: E402
+
+SECRET = "bench-secret-" + "x" * 32
+
+
+def make_tokens(users):
+    exp = int(time.time()) + 3600
+    return [
+        jwt.encode(
+            {"sub": f"user-{i}", "aud": "authenticated", "exp": exp, "role": "authenticated"},
+            SECRET,
+            algorithm="HS256",
+        )
+        for i in range(users)
+    ]
+
+
+def make_request(token):
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+async def run(requests, concurrency, tokens, bad_tokens, invalid, seed):
+    rng = random.Random(seed)
+    plan = [
+        make_request(rng.choice(bad_tokens) if rng.random() < invalid else rng.choice(tokens))
+        for _ in range(requests)
+    ]
+    latencies = []
+    queue = iter(plan)
+
+    async def worker():
+        for request in queue:
+            start = time.perf_counter()
+            await get_optional_user_id(request)
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0)  # Interleave like concurrent requests on one loop
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+def report(label, elapsed, latencies):
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e6  # noqa: E731
+    print(
+        f"{label:<10} {len(latencies) / elapsed:>10.0f} req/s  "
+        f"mean {statistics.fmean(latencies) * 1e6:>6.1f} us  "
+        f"p50 {pct(0.50):>6.1f} us  p99 {pct(0.99):>6.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--invalid", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    settings.supabase_jwt_secret = SECRET
+    tokens = make_tokens(args.users)
+    bad_tokens = [t[:-4] + ("AAAA" if not t.endswith("AAAA") else "BBBB") for t in tokens[:5]]
+
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"{args.users} users, {args.invalid:.0%} invalid tokens"
+    )
+    for label, enabled in (("uncached", False), ("cached", True)):
+        settings.jwt_cache_enabled = enabled
+        memory_cache.invalidate("jwt")
+        elapsed, latencies = asyncio.run(
+            run(args.requests, args.concurrency, tokens, bad_tokens, args.invalid, args.seed)
+        )
+        report(label, elapsed, latencies)
+
+    stats = memory_cache.stats()["namespaces"]["jwt"]
+    print(f"cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Benchmark serial vs. sharded PDF text extraction across worker counts.
+
+Usage (from the repo root):
+    python scripts/bench-extraction.py path/to/large.pdf [--workers 1 2 4 8] [--repeat 3]
+
+Bypasses the text store, so every run measures a cold extraction.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(SCRIPT_DIR), "backend"))
+
+from app.services.pdf_service import _extract_page_range, extract_pages_sharded  # noqa: E402
+
+
+def time_best(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdf")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    import pymupdf
+
+    with pymupdf.open(args.pdf) as doc:
+        page_count = len(doc)
+    print(f"{args.pdf}: {page_count} pages, {os.cpu_count()} CPUs\n")
+
+    serial_time, serial_pages = time_best(
+        lambda: _extract_page_range(args.pdf, 0, page_count), args.repeat
+    )
+    print(f"{'mode':<12}{'workers':>8}{'seconds':>10}{'pages/s':>10}{'speedup':>9}")
+    print(f"{'serial':<12}{1:>8}{serial_time:>10.3f}{page_count / serial_time:>10.1f}{1:>9.2f}")
+
+    for workers in sorted(set(args.workers)):
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+            # Warm the pool so process start-up is not counted
+            list(executor.map(abs, range(workers)))
+            elapsed, pages = time_best(
+                lambda: extract_pages_sharded(args.pdf, page_count, executor, workers),
+                args.repeat,
+            )
+        assert pages == serial_pages, "sharded output differs from serial extraction"
+        print(
+            f"{'sharded':<12}{workers:>8}{elapsed:>10.3f}"
+            f"{page_count / elapsed:>10.1f}{serial_time / elapsed:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
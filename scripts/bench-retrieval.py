@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark BM25 vs. TF-IDF chunk retrieval on a real paper.
+
+Usage (from the repo root):
+    python scripts/bench-retrieval.py path/to/long.pdf [--queries 50] [--top-k 15]
+
+Queries are sampled from the paper itself. The overlap reported is between the
+two engines' top-k over the same chunks; parity with the original TF-IDF
+retrieval is asserted by backend/tests/test_retrieval.py.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(SCRIPT_DIR), "backend"))
+
+from app.services.pdf_service import extract_text, get_toc  # noqa: E402
+from app.services.retrieval_service import build_index  # noqa: E402
+
+
+def sample_queries(text, count, seed):
+    rng = random.Random(seed)
+    words = text.split()
+    queries = []
+    for _ in range(count):
+        start = rng.randrange(max(1, len(words) - 8))
+        queries.append(" ".join(words[start : start + rng.randint(3, 8)]))
+    return queries
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdf")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pages = extract_text(args.pdf)
+    toc = get_toc(args.pdf)
+    text = "\n\n".join(p["text"] for p in pages)
+    queries = sample_queries(text, args.queries, args.seed)
+
+    start = time.perf_counter()
+    import sklearn.feature_extraction.text  # noqa: F401
+
+    sklearn_import = time.perf_counter() - start
+
+    results = {}
+    print(f"{'engine':<8}{'build ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for engine in ("tfidf", "bm25"):
+        build_time, index = timed(lambda: build_index(pages, toc, engine))
+        latencies = []
+        results[engine] = []
+        for query in queries:
+            elapsed, top = timed(lambda: index.search(query, args.top_k))
+            latencies.append(elapsed * 1000)
+            results[engine].append(set(top))
+        latencies.sort()
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(
+            f"{engine:<8}{build_time * 1000:>10.1f}{statistics.median(latencies):>9.2f}"
+            f"{p95:>9.2f}{latencies[-1]:>9.2f}"
+        )
+
+    overlaps = [
+        len(t & b) / len(t) for t, b in zip(results["tfidf"], results["bm25"]) if t
+    ]
+    print(f"\nsklearn import (paid once by the tfidf engine): {sklearn_import * 1000:.0f} ms")
+    print(f"chunks: {len(index.chunks)}, top-k: {args.top_k}, queries: {len(queries)}")
+    print(f"BM25 recall of TF-IDF top-k: mean {statistics.mean(overlaps):.2%}, "
+          f"min {min(overlaps):.2%}")
+
+
+if __name__ == "__main__":
+    main()